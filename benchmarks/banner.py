@@ -0,0 +1,46 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+"""Rendering of a synthetic 5,000 lines listing through ``Banner``.
+
+Usage: ``python benchmarks/banner.py [NB_LINES]``
+"""
+
+import os
+import sys
+import time
+
+from nagare.admin import admin
+
+
+def render(nb_lines, buffered, file):
+    banner = admin.Banner(admin.NAGARE_BANNER, admin.NAGARE_KAKEMONO, admin.NAGARE_COLOR, True, '  ', file, buffered)
+    with banner as display:
+        for i in range(nb_lines):
+            display('- command_{}: description of the command {}'.format(i, i))
+
+
+def bench(nb_lines, buffered):
+    with open(os.devnull, 'w', buffering=1) as file:
+        start = time.perf_counter()
+        render(nb_lines, buffered, file)
+        return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    nb_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    unbuffered = min(bench(nb_lines, False) for _ in range(5))
+    buffered = min(bench(nb_lines, True) for _ in range(5))
+
+    print(
+        '{} lines: unbuffered {:.2f}ms, buffered {:.2f}ms (x{:.1f})'.format(
+            nb_lines, unbuffered * 1000, buffered * 1000, unbuffered / buffered
+        )
+    )
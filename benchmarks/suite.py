@@ -0,0 +1,223 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+"""Startup and completion benchmarks in a synthetic environment.
+
+Usage:
+
+  - ``python benchmarks/suite.py run [-o results.json] [--src CHECKOUT/src]``
+  - ``python benchmarks/suite.py compare before.json after.json [--threshold 0.2]``
+
+The ``compare`` command exits with 1 if a benchmark is slower than the
+reference by more than the threshold (relative) or failed. The duration of a
+failed benchmark is recorded as ``null``.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+import synthetic
+
+INFO_SECTIONS = ('general', 'packages', 'services', 'applications')
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def measure(env, args, nb_runs, extra_env=None):
+    """Median duration of the runs of a Python command.
+
+    Raises:
+      BenchmarkError: if the command fails
+    """
+    durations = []
+
+    for _ in range(nb_runs):
+        start = time.perf_counter()
+        process = subprocess.run(  # noqa: S603
+            [sys.executable] + args,
+            env=dict(env, **(extra_env or {})),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        durations.append(time.perf_counter() - start)
+
+        if process.returncode:
+            error = process.stderr.strip().splitlines()
+            raise BenchmarkError(error[-1] if error else 'exit code {}'.format(process.returncode))
+
+    return statistics.median(durations)
+
+
+def record(results, name, f, *args):
+    """Store the result of a benchmark, ``None`` if it failed."""
+    try:
+        results[name] = f(*args)
+    except BenchmarkError as e:
+        print('Benchmark <{}> failed: {}'.format(name, e), file=sys.stderr)
+        results[name] = None
+
+
+def measure_cold(env, args, nb_runs, cache_dir):
+    """Median duration of runs each starting with an empty cache directory."""
+    durations = []
+
+    for i in range(nb_runs):
+        durations.append(measure(env, args, 1, {'NAGARE_CACHE_DIR': '{}-{}'.format(cache_dir, i)}))
+
+    return statistics.median(durations)
+
+
+def run_bundle_benchmarks(env, path, commands, nb_runs):
+    """Cold start of a command, installed and from the bundles created by ``nagare bundle``."""
+    results = {}
+    nagare = ['-m', 'nagare.admin']
+
+    record(results, 'cold_dispatch', measure_cold, env, nagare + [commands[0]], nb_runs, os.path.join(path, 'cold'))
+
+    packages = []
+    for i in range(len(commands)):
+        packages.extend(['-p', 'synthetic-{}'.format(i)])
+
+    for name, bundle in (('bundle_dir', 'bundle'), ('bundle_zip', 'bundle.pyz')):
+        bundle = os.path.join(path, bundle)
+        process = subprocess.run(  # noqa: S603
+            [sys.executable] + nagare + ['bundle'] + packages + [bundle],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        if process.returncode == 0:
+            record(results, 'cold_' + name, measure_cold, env, [bundle, commands[0]], nb_runs, os.path.join(path, name))
+
+    return results
+
+
+def run_benchmarks(nb_distributions, nb_commands, nb_services, nb_runs, src=None):
+    results = {}
+
+    with tempfile.TemporaryDirectory() as path:
+        environment = os.path.join(path, 'site')
+        commands = synthetic.create_environment(environment, nb_distributions, nb_commands, nb_services)
+
+        python_path = [environment] + ([os.path.abspath(src)] if src else [])
+        env = dict(
+            os.environ,
+            PYTHONPATH=os.pathsep.join(python_path + [os.environ.get('PYTHONPATH', '')]),
+            NAGARE_CACHE_DIR=os.path.join(path, 'cache'),
+        )
+        nagare = ['-m', 'nagare.admin']
+
+        record(results, 'dispatch', measure, env, nagare + [commands[0]], nb_runs)
+        record(results, 'listing', measure, env, nagare + ['-a'], nb_runs)
+
+        completion = os.path.join(path, 'completion')
+        for name, line in (('complete_command', 'nagare cm'), ('complete_option', 'nagare {} --'.format(commands[0]))):
+            record(
+                results,
+                name,
+                measure,
+                env,
+                nagare,
+                nb_runs,
+                {
+                    '_ARGCOMPLETE': '1',
+                    '_ARGCOMPLETE_SHELL': 'bash',
+                    '_ARGCOMPLETE_STDOUT_FILENAME': completion,
+                    'COMP_LINE': line,
+                    'COMP_POINT': str(len(line)),
+                },
+            )
+
+        for section in INFO_SECTIONS:
+            record(results, 'info_' + section, measure, env, nagare + ['info', '--' + section], nb_runs)
+
+        results.update(run_bundle_benchmarks(env, path, commands, nb_runs))
+
+        banner = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'banner.py')
+        process = subprocess.run(  # noqa: S603
+            [sys.executable, '-c', 'import banner; print(banner.bench(5000, True))'],
+            env=dict(env, PYTHONPATH=os.pathsep.join([os.path.dirname(banner), env['PYTHONPATH']])),
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode == 0:
+            results['banner'] = float(process.stdout)
+
+    return results
+
+
+def compare(reference, results, threshold):
+    regressions = 0
+
+    for name, duration in sorted(results.items()):
+        before = reference.get(name)
+        if duration is None:
+            regressions += 1
+            print('{:20} {:>9}'.format(name, 'FAILED'))
+            continue
+
+        if not before:
+            print('{:20} {:9.1f}ms'.format(name, duration * 1000))
+            continue
+
+        delta = (duration - before) / before
+        regression = delta > threshold
+        regressions += regression
+
+        print(
+            '{:20} {:9.1f}ms {:9.1f}ms {:+7.1%}{}'.format(
+                name, before * 1000, duration * 1000, delta, '  REGRESSION' if regression else ''
+            )
+        )
+
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run = subparsers.add_parser('run', help='run the benchmarks')
+    run.add_argument('-d', '--distributions', type=int, default=300, help='number of fake distributions')
+    run.add_argument('-c', '--commands', type=int, default=50, help='number of fake commands')
+    run.add_argument('-s', '--services', type=int, default=20, help='number of fake services')
+    run.add_argument('-r', '--runs', type=int, default=5, help='number of runs of each benchmark')
+    run.add_argument('--src', help='sources directory of the checkout to benchmark')
+    run.add_argument('-o', '--output', help='JSON results file')
+
+    comparison = subparsers.add_parser('compare', help='compare two results files')
+    comparison.add_argument('reference')
+    comparison.add_argument('results')
+    comparison.add_argument('-t', '--threshold', type=float, default=0.2, help='maximum relative slowdown')
+
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        with open(args.reference) as reference, open(args.results) as results:
+            return compare(json.load(reference), json.load(results), args.threshold)
+
+    results = run_benchmarks(args.distributions, args.commands, args.services, args.runs, args.src)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return compare({}, results, 0)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
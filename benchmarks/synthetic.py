@@ -0,0 +1,87 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+"""Synthetic environments of Nagare plugins.
+
+A synthetic environment is a directory, to put on ``sys.path``, with ``N``
+fake distributions registering ``M`` commands and services entry points.
+"""
+
+import os
+
+COMMAND_MODULE = """
+from nagare.admin import admin
+
+
+class Command(admin.Command):
+    DESC = 'synthetic command {name}'
+    WITH_CONFIG_FILENAME = False
+
+    def set_arguments(self, parser):
+        parser.add_argument('-v', '--verbose', action='store_true', help='verbose mode')
+        parser.add_argument('-n', '--number', type=int, default=0, help='a number')
+        super().set_arguments(parser)
+
+    def run(self, verbose, number):
+        return 0
+"""
+
+SERVICE_MODULE = """
+from nagare.services import plugin
+
+
+class Service(plugin.Plugin):
+    LOAD_PRIORITY = {priority}
+"""
+
+
+def create_environment(path, nb_distributions=300, nb_commands=50, nb_services=20):
+    """Create a synthetic environment.
+
+    Args:
+      path: directory where to create the environment
+      nb_distributions: number of fake distributions
+      nb_commands: number of ``nagare.commands`` entry points
+      nb_services: number of ``nagare.services`` entry points
+
+    Returns:
+      the list of the commands names
+    """
+    os.makedirs(path, exist_ok=True)
+
+    commands = []
+    for i in range(nb_distributions):
+        name = 'synthetic_{}'.format(i)
+        dist_info = os.path.join(path, '{}-1.0.dist-info'.format(name))
+        os.makedirs(dist_info, exist_ok=True)
+
+        with open(os.path.join(dist_info, 'METADATA'), 'w') as f:
+            f.write('Metadata-Version: 2.1\nName: {}\nVersion: 1.0\n'.format(name.replace('_', '-')))
+
+        entry_points = []
+
+        if i < nb_commands:
+            commands.append('cmd{}'.format(i))
+            entry_points.append('[nagare.commands]\ncmd{} = {}.command:Command\n'.format(i, name))
+            os.makedirs(os.path.join(path, name), exist_ok=True)
+            with open(os.path.join(path, name, 'command.py'), 'w') as f:
+                f.write(COMMAND_MODULE.format(name=name))
+
+        if i < nb_services:
+            entry_points.append('[nagare.services]\nsvc{} = {}.service:Service\n'.format(i, name))
+            os.makedirs(os.path.join(path, name), exist_ok=True)
+            with open(os.path.join(path, name, 'service.py'), 'w') as f:
+                f.write(SERVICE_MODULE.format(priority=1000 + i % 5))
+
+        if entry_points:
+            open(os.path.join(path, name, '__init__.py'), 'w').close()
+            with open(os.path.join(dist_info, 'entry_points.txt'), 'w') as f:
+                f.write('\n'.join(entry_points))
+
+    return commands
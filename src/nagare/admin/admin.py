@@ -11,14 +11,15 @@
 
 import os
 import sys
+import functools
+import importlib
+import contextlib
 from itertools import dropwhile
 
-import appdirs
 from colorama import Fore, Style
 
 from nagare import commands
-from nagare.config import ConfigError, config_from_dict, config_from_file
-from nagare.services.services import Services
+from nagare.admin import index, trace
 
 NAGARE_KAKEMONO = r"""
  ,,       ;
@@ -64,8 +65,197 @@ def find_path(choices, name):
     return next(dropwhile(lambda dir: not os.path.isdir(dir), choices), '')
 
 
+class ImportedAttribute:
+    """Class attribute only imported when accessed.
+
+    Keeps the heavy modules out of the commands dispatch path.
+    """
+
+    def __init__(self, reference):
+        self.reference = reference
+
+    def __get__(self, instance, owner):
+        module, attribute = self.reference.split(':')
+        return getattr(importlib.import_module(module), attribute)
+
+
+@functools.lru_cache()
+def find_user_data_file(user_data_file=None):
+    if user_data_file is None:
+        import appdirs
+
+        user_data_file = os.path.join(appdirs.user_data_dir('nagare'), 'nagare.cfg')
+
+    return os.path.isfile(user_data_file), os.path.abspath(user_data_file)
+
+
+LOADED_CONFIGS = {}
+
+
+def load_config(config_filename, user_data_file=None):
+    """Load the user configuration file, if any, merged with the application configuration file.
+
+    The configuration is loaded only once by process and a copy is returned to
+    each caller, free to modify it. If the ``NAGARE_CONFIG_CACHE`` environment
+    variable is set, the merged configuration is also cached on disk, keyed by
+    the modification times of the files.
+
+    Args:
+      config_filename: path to the application configuration file
+      user_data_file: path to the user configuration file (``None`` if no user configuration)
+
+    Returns:
+      the merged configuration
+    """
+    import copy
+    import pickle
+    import hashlib
+
+    from nagare.config import config_from_dict, config_from_file
+
+    config_filenames = ([user_data_file] if user_data_file else []) + [os.path.abspath(config_filename)]
+
+    key = tuple(
+        (filename, stat.st_mtime_ns, stat.st_size)
+        for filename, stat in zip(config_filenames, map(os.stat, config_filenames))
+    )
+    config = LOADED_CONFIGS.get(key)
+    if config is not None:
+        return copy.deepcopy(config)
+
+    cache_filename = None
+    if os.environ.get('NAGARE_CONFIG_CACHE'):
+        cache_filename = os.path.join(
+            index.get_cache_dir(),
+            'config-{}.pickle'.format(hashlib.sha1(repr((sys.version, key)).encode('utf-8')).hexdigest()),  # noqa: S324
+        )
+
+        try:
+            with open(cache_filename, 'rb') as f:
+                config = pickle.load(f)  # noqa: S301
+        except Exception:  # noqa: S110
+            pass
+
+    if config is None:
+        if user_data_file:
+            with trace.span('config_from_file', 'config', filename=user_data_file):
+                config = config_from_file(user_data_file, {'here': os.path.dirname(user_data_file)})
+        else:
+            config = config_from_dict({})
+
+        config_filename = config_filenames[-1]
+        with trace.span('config_from_file', 'config', filename=config_filename):
+            application_config = config_from_file(config_filename, {'here': os.path.dirname(config_filename)})
+
+        with trace.span('merge', 'config'):
+            config.merge(application_config)
+
+        if cache_filename:
+            try:
+                os.makedirs(os.path.dirname(cache_filename), exist_ok=True)
+                with open(cache_filename, 'wb') as f:
+                    pickle.dump(config, f)
+            except Exception:  # noqa: S110
+                pass
+
+    LOADED_CONFIGS[key] = config
+
+    return copy.deepcopy(config)
+
+
+def async_services_hooks(services, method):
+    """The ``async_start()`` or ``async_stop()`` coroutine functions of the services."""
+    import inspect
+
+    return [
+        getattr(service, method)
+        for service in services.values()
+        if inspect.iscoroutinefunction(getattr(service, method, None))
+    ]
+
+
+def cancel_tasks(loop):
+    """Cancel all the pending tasks of a loop and wait for them, as ``asyncio.run()`` does."""
+    import asyncio
+
+    tasks = [task for task in asyncio.all_tasks(loop) if not task.done()]
+    for task in tasks:
+        task.cancel()
+
+    if tasks:
+        with contextlib.suppress(BaseException):
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+
+def run_coroutine(services, result):
+    """Run the result of a command on a managed event loop, if it's a coroutine.
+
+    The services ``async_start()`` coroutines are run before the command and
+    their ``async_stop()`` coroutines after it, even on Ctrl-C. Then all the
+    remaining tasks are cancelled and awaited before the loop is closed.
+    """
+    import inspect
+
+    if not inspect.iscoroutine(result):
+        return result
+
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    try:
+        try:
+            loop.run_until_complete(
+                asyncio.gather(*(start() for start in async_services_hooks(services, 'async_start')))
+            )
+        except BaseException:
+            result.close()
+            raise
+
+        try:
+            return loop.run_until_complete(loop.create_task(result))
+        finally:
+            cancel_tasks(loop)
+            loop.run_until_complete(
+                asyncio.gather(
+                    *(stop() for stop in async_services_hooks(services, 'async_stop')), return_exceptions=True
+                )
+            )
+            cancel_tasks(loop)
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+def isatty(file=None):
+    """Is the output, ``sys.stderr`` by default, a terminal?"""
+    isatty = getattr(file or sys.stderr, 'isatty', None)
+    return bool(isatty and isatty())
+
+
+def highlight(text, file=None):
+    """Highlight a text, only if the output is a terminal."""
+    return (Style.BRIGHT + text + Style.RESET_ALL) if isatty(file) else text
+
+
 class Banner:
-    def __init__(self, banner='', kakemono='', color=None, bright=False, padding='', file=None):
+    """Display lines, prefixed by a kakemono.
+
+    When the output is not a terminal, the color and the kakemono are dropped.
+    In buffered mode, the lines are only written and flushed when the banner ends.
+    """
+
+    def __init__(self, banner='', kakemono='', color=None, bright=False, padding='', file=None, buffered=False):
+        self.file = file or sys.stderr
+
+        if not isatty(self.file):
+            kakemono = ''
+            color = None
+
         self.banner = banner
         self.kakemono = kakemono.strip('\n').replace('|', ' ').splitlines()
         self.kakemono_width = max(map(len, self.kakemono)) if self.kakemono else 0
@@ -73,31 +263,49 @@ class Banner:
         self.bright = bright
         self.padding = padding
         self.first = True
-        self.file = file or sys.stderr
+        self.buffer = [] if buffered else None
 
-    def display(self, lines=''):
-        if self.first:
-            self.first = False
-            self.display(self.banner.splitlines())
+        if color is None:
+            self.prefix = self.suffix = ''
+        else:
+            self.prefix = color + (Style.BRIGHT if bright else '')
+            self.suffix = Style.RESET_ALL
 
+    def format(self, lines):
         for line in [lines] if isinstance(lines, str) else lines:
-            kakemono = self.kakemono.pop(0) if self.kakemono else (' ' * self.kakemono_width)
-            self.file.write(
-                '{}{}{}{}{}{}\n'.format(
-                    self.color if self.color is not None else '',
-                    Style.BRIGHT if (self.color is not None) and self.bright else '',
-                    kakemono.ljust(self.kakemono_width),
-                    Style.RESET_ALL if self.color is not None else '',
-                    self.padding,
-                    line,
-                )
+            kakemono = self.kakemono.pop(0) if self.kakemono else ''
+            yield '{}{}{}{}{}\n'.format(
+                self.prefix, kakemono.ljust(self.kakemono_width), self.suffix, self.padding, line
             )
+
+    def write(self, lines):
+        if self.buffer is not None:
+            self.buffer.extend(lines)
+        elif lines:
+            self.file.write(''.join(lines))
+            self.file.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write(''.join(self.buffer))
             self.file.flush()
+            self.buffer = []
+
+    def display(self, lines=''):
+        formatted_lines = []
+
+        if self.first:
+            self.first = False
+            formatted_lines.extend(self.format(self.banner.splitlines()))
+
+        formatted_lines.extend(self.format(lines))
+        self.write(formatted_lines)
 
     def end(self):
-        if not self.first:
-            while self.kakemono:
-                self.display()
+        if not self.first and self.kakemono:
+            self.write(list(self.format([''] * len(self.kakemono))))
+
+        self.flush()
 
     def __enter__(self):
         return self.display
@@ -127,20 +335,75 @@ class ArgumentParser(commands.ArgumentParser):
 
 
 class Command(commands.Command):
-    """The base class of all the commands."""
+    """The base class of all the commands.
+
+    The ``run()`` method can be a coroutine. It's then run on an event loop
+    managed by the command, the services with ``async_start()`` and
+    ``async_stop()`` coroutines being concurrently started before and stopped
+    after it.
+    """
 
     WITH_CONFIG_FILENAME = True
     WITH_STARTED_SERVICES = False
-    SERVICES_FACTORY = Services
+    CONCURRENT_SERVICES = True
+    SERVICES_FACTORY = ImportedAttribute('nagare.services.services:Services')
 
-    def create_banner(self, names):
+    def create_banner(self, names, buffered=False):
         if names.startswith(('nagare', 'nagare-admin')):
-            banner = Banner(NAGARE_BANNER, NAGARE_KAKEMONO, NAGARE_COLOR, True, '  ')
+            banner = Banner(NAGARE_BANNER, NAGARE_KAKEMONO, NAGARE_COLOR, True, '  ', buffered=buffered)
         else:
-            banner = Banner()
+            banner = Banner(buffered=buffered)
 
         return banner
 
+    @classmethod
+    def get_arguments_manifest(cls):
+        """Arguments of the command, as data.
+
+        Used by the shell completion to build the parser of the command without
+        importing its module. Commands can overload it to return a static
+        manifest or ``None`` if their arguments can't be described statically.
+        """
+        parser = commands.ArgumentParser(add_help=False)
+        cls('', None).set_arguments(parser)
+
+        return index.parser_to_manifest(parser)
+
+    @classmethod
+    def get_services_factory(cls):
+        """The services class, with the loading strategies activated by the environment.
+
+        The services entry points are always resolved from the entry points registry.
+
+        - ``NAGARE_SERVICES_CACHE``: resolve the services entry points from the index
+        - ``NAGARE_CONCURRENT_SERVICES``: create the services of a same tier concurrently,
+          if the command has ``CONCURRENT_SERVICES``
+        - ``NAGARE_TRACE``: record the entry points resolution and the creation of each service
+        """
+        from nagare.admin.services import registry_services
+
+        services_factory = registry_services(cls.SERVICES_FACTORY)
+
+        if os.environ.get('NAGARE_SERVICES_CACHE'):
+            from nagare.admin.services import cached_services
+
+            services_factory = cached_services(services_factory)
+
+        if trace.get_tracer() is not None:
+            from nagare.admin.services import traced_services
+
+            services_factory = traced_services(services_factory)
+
+        max_workers = os.environ.get('NAGARE_CONCURRENT_SERVICES')
+        if max_workers and cls.CONCURRENT_SERVICES:
+            from nagare.admin.services import concurrent_services
+
+            services_factory = concurrent_services(
+                services_factory, int(max_workers) if max_workers.isdigit() else None
+            )
+
+        return services_factory
+
     @classmethod
     def _create_services(cls, config, config_filename, roots=(), global_config=None, create_application=False):
         root_path = find_path(roots, '')
@@ -159,40 +422,97 @@ class Command(commands.Command):
             initial_config['_global_config'] = global_config
             config['application']['_initial_config'] = initial_config
 
-        return cls.SERVICES_FACTORY().load_plugins('services', config, global_config, True)
+        with trace.span('create services', 'services'):
+            return cls.get_services_factory()().load_plugins('services', config, global_config, True)
 
     @staticmethod
     def get_user_data_file():
-        user_data_dir = appdirs.user_data_dir('nagare')
-        user_data_file = os.path.join(user_data_dir, 'nagare.cfg')
+        return find_user_data_file(os.environ.get('NAGARE_USER_CONFIG'))
 
-        user_data_file = os.environ.get('NAGARE_USER_CONFIG', user_data_file)
+    @classmethod
+    def load_config(cls, config_filename):
+        has_user_data_file, user_data_file = cls.get_user_data_file()
 
-        return os.path.isfile(user_data_file), os.path.abspath(user_data_file)
+        with trace.span('load config', 'config', filename=config_filename):
+            return load_config(config_filename, user_data_file if has_user_data_file else None)
 
-    def _run(self, command_names, next_method=None, config_filename=None, **arguments):
-        if self.WITH_CONFIG_FILENAME:
-            has_user_data_file, user_data_file = self.get_user_data_file()
+    def _load_services(self, config, config_filename):
+        """Run the preload stage of the configuration, then take its preloaded services or create them.
 
-            if has_user_data_file:
-                config = config_from_file(user_data_file, {'here': os.path.dirname(user_data_file)})
-            else:
-                config = config_from_dict({})
+        Returns:
+          the services and if the application was already created
+        """
+        from nagare.admin import preload
+
+        if config is not None:
+            with trace.span('preload', 'config'):
+                preload.preload(config, config_filename, type(self))
 
+        services, app_created = preload.pop_preloaded_services(config_filename, type(self))
+        if services is None:
+            services = self._create_services(config, config_filename)
+
+        return services, app_created
+
+    def _run(self, command_names, next_method=None, config_filename=None, **arguments):
+        if self.WITH_CONFIG_FILENAME:
             config_filename = os.path.abspath(config_filename)
-            config.merge(config_from_file(config_filename, {'here': os.path.dirname(config_filename)}))
+            config = self.load_config(config_filename)
         else:
             config = None
 
-        services = self._create_services(config, config_filename)
+        services, app_created = self._load_services(config, config_filename)
 
         publisher = services.get('publisher')
-        if self.WITH_STARTED_SERVICES and publisher:
-            services(publisher.create_app)
+        if self.WITH_STARTED_SERVICES and publisher and not app_created:
+            with trace.span('create_app', 'application'):
+                services(publisher.create_app)
+
+        with trace.span('run', 'command'):
+            return run_coroutine(services, services((next_method or self.run), **arguments))
 
-        return services((next_method or self.run), **arguments)
+    def run_configs(self, command_names, patterns, jobs, args):
+        """Run the command against each configuration file matching the patterns, in parallel."""
+        from nagare.admin import parallel
+
+        results = parallel.run_configs(command_names, patterns, jobs, args)
+        if not results:
+            print('No configuration file matching {}'.format(', '.join(patterns)), file=sys.stderr)
+            return -2
+
+        from nagare.services.reporters import Reporter
+
+        reporter = Reporter(
+            (
+                ('Configuration', lambda config_filename, status, duration: config_filename, True),
+                ('Status', lambda config_filename, status, duration: str(status), False),
+                ('Time (ms)', lambda config_filename, status, duration: '%.1f' % (duration * 1000), False),
+            )
+        )
+        with Banner(file=sys.stdout, buffered=True) as display:
+            display('')
+            reporter.report({'configuration', 'status', 'time (ms)'}, results, False, display, 0)
+
+        return next((status for _, status, _ in results if status), 0)
 
     def execute(self, command_names=(), args=None):
+        from nagare.config import ConfigError
+
+        if self.WITH_CONFIG_FILENAME:
+            from nagare.admin import parallel
+
+            # The options of the command take precedence
+            parser = commands.ArgumentParser(add_help=False)
+            self.set_arguments(parser)
+            options = parser._option_string_actions
+
+            if '--configs' not in options:
+                patterns, jobs, remaining_args = parallel.parse_configs_arguments(
+                    sys.argv[1:] if args is None else args, '--jobs' not in options
+                )
+                if patterns:
+                    return self.run_configs(command_names, patterns, jobs, remaining_args)
+
         try:
             return super().execute(command_names, args)
         except ConfigError as e:
@@ -208,9 +528,15 @@ class Command(commands.Command):
 
         if self.WITH_CONFIG_FILENAME:
             parser.add_argument('config_filename', nargs='?', help='configuration file')
+            if (parser.epilog is None) and ('--configs' not in parser._option_string_actions):
+                parser.epilog = (
+                    'Use `--configs PATTERN [--configs PATTERN ...] [--jobs N]` instead of the configuration file '
+                    'to run the command against all the matching configuration files, N at a time'
+                )
 
     def parse(self, parser, args):
-        arguments = super().parse(parser, args)
+        with trace.span('parse arguments', 'command'):
+            arguments = super().parse(parser, args)
 
         if self.WITH_CONFIG_FILENAME:
             try:
@@ -243,15 +569,134 @@ class Command(commands.Command):
             display('{}- {}: {}'.format(' ' * indent, self.name, self.DESC))
 
 
+class LazyCommand:
+    """Stand-in for a command, built from the entry points index.
+
+    The module of the command is only imported when the command is executed.
+    The listings are served from the index and the cached descriptions.
+    """
+
+    def __init__(self, name, node, group):
+        self.name = name
+        self.node = node
+        self.group = group
+        self.entry = node.get('_entry')
+        self.description = None
+        self._command = None
+
+    @property
+    def is_group(self):
+        return bool(index.sub_commands(self.node))
+
+    @property
+    def command(self):
+        if self._command is None:
+            with trace.span('load command', 'command', command=self.name):
+                command_cls = index.create_entry_point(self.entry).load() if self.entry else Commands
+
+            if isinstance(command_cls, type) and issubclass(command_cls, commands.Commands):
+                self._command = command_cls(self.name, None, entry_points=self.group + '.' + self.name)
+            else:
+                self._command = command_cls(self.name, None)
+
+        return self._command
+
+    @property
+    def DESC(self):  # noqa: N802
+        if self.description is None:
+            load_descriptions([self])
+
+        return self.description
+
+    def sub_commands(self):
+        group = self.group + '.' + self.name
+        return [LazyCommand(name, node, group) for name, node in sorted(index.sub_commands(self.node).items())]
+
+    def execute(self, command_names=(), args=None):
+        return self.command.execute(command_names, args)
+
+    def usage_name(self, ljust=0):
+        usage_name = self.name.ljust(ljust)
+        return highlight(usage_name) if self.is_group else usage_name
+
+    def display_command(self, top_level, level_to_display, level):
+        if not level_to_display or (level + 1 == level_to_display):
+            indent = 0 if level_to_display else (level * 4)
+            print('{}{}'.format(' ' * indent, self.name))
+
+        for sub_command in self.sub_commands() if self.is_group else ():
+            sub_command.display_command(False, level_to_display, level + 1)
+
+    def display_command_verbose(self, top_level, level_to_display, level, display):
+        if not self.is_group:
+            if not level_to_display or (level + 1 == level_to_display):
+                indent = 0 if level_to_display else (level * 4)
+                display('{}- {}: {}'.format(' ' * indent, self.name, self.DESC))
+
+            return
+
+        if not level_to_display or (level + 1 == level_to_display):
+            indent = 0 if level_to_display else (level * 4)
+            display('{}* {} ({})'.format(' ' * indent, self.name, self.DESC))
+            if not level_to_display:
+                display()
+
+        sub_commands = self.sub_commands()
+        load_descriptions(sub_commands)
+
+        for sub_command in sub_commands:
+            sub_command.display_command_verbose(False, level_to_display, level + 1, display)
+            if not level_to_display and top_level:
+                display()
+
+    def __getattr__(self, name):
+        return getattr(self.command, name)
+
+    def __lt__(self, other):
+        return self.name < other.name
+
+    def __repr__(self):
+        return '<{} {}.{}>'.format(self.__class__.__name__, self.group, self.name)
+
+
+def load_descriptions(lazy_commands):
+    """Set the descriptions of lazy commands from the index, in one pass."""
+    lazy_commands = [command for command in lazy_commands if command.description is None]
+    entries = [command.entry for command in lazy_commands if command.entry]
+
+    descriptions = dict(zip(map(index.entry_key, entries), index.get_index().descriptions(entries)))
+    for command in lazy_commands:
+        command.description = descriptions.get(index.entry_key(command.entry), '') if command.entry else ''
+
+
 class Commands(commands.Commands):
+    def __init__(self, name=None, dist=None, entry_points=None, **config):
+        self.commands_group = entry_points
+        super().__init__(name, dist, entry_points=entry_points, **config)
+        if not self:
+            self.load_plugins()
+
+    def load_plugins(self, *args, **kw):
+        """Register the sub-commands as lazy proxies, without importing their modules."""
+        self.clear()
+
+        group = self.commands_group
+        if group:
+            node = index.get_index().commands_tree()
+            for name in group.split('.')[2:]:
+                node = node.get(name, {})
+
+            for name, sub_node in sorted(index.sub_commands(node).items()):
+                self[name] = LazyCommand(name, sub_node, group)
+
     def usage_name(self, ljust=0):
-        return Style.BRIGHT + super().usage_name(ljust) + Style.RESET_ALL
+        return highlight(super().usage_name(ljust))
 
-    def create_banner(self, names):
+    def create_banner(self, names, buffered=False):
         if names.startswith(('nagare', 'nagare-admin')):
-            banner = Banner(NAGARE_BANNER, NAGARE_KAKEMONO, NAGARE_COLOR, True, '  ')
+            banner = Banner(NAGARE_BANNER, NAGARE_KAKEMONO, NAGARE_COLOR, True, '  ', buffered=buffered)
         else:
-            banner = Banner()
+            banner = Banner(buffered=buffered)
 
         return banner
 
@@ -284,13 +729,17 @@ class Commands(commands.Commands):
         if quiet:
             self.display_command(len(command_names) == 1, level_to_display, 0)
         else:
-            with self.create_banner(' '.join(command_names)) as display:
+            load_descriptions(command for command in self.values() if isinstance(command, LazyCommand))
+
+            with self.create_banner(' '.join(command_names), buffered=True) as display:
                 self.display_command_verbose(len(command_names) == 1, level_to_display, 0, display)
 
         return 0
 
     def usage(self, names):
-        with self.create_banner(' '.join(names)) as display:
+        load_descriptions(command for command in self.values() if isinstance(command, LazyCommand))
+
+        with self.create_banner(' '.join(names), buffered=True) as display:
             super().usage(names, display)
 
     def display_command_verbose(self, top_level, level_to_display, level, display):
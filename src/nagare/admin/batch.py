@@ -0,0 +1,155 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+import os
+import sys
+import time
+import shlex
+
+from nagare import commands
+from nagare.admin import main, admin
+from nagare.services.reporters import Reporter
+
+
+class Batch(admin.Command):
+    DESC = 'run a list of commands in one process, sharing the configuration and the services'
+
+    def set_arguments(self, parser):
+        parser.add_argument(
+            '-f',
+            '--file',
+            default='-',
+            dest='steps_filename',
+            help=(
+                'file of the commands to run, one by line, without the configuration file which is appended '
+                'to the arguments of the commands needing one (default: stdin)'
+            ),
+        )
+        parser.add_argument(
+            '-k', '--keep-going', action='store_true', help='run the next commands even if a command fails'
+        )
+
+        super().set_arguments(parser)
+
+    @staticmethod
+    def read_steps(steps_filename):
+        """Read the commands, one by line. Empty lines and comments are ignored."""
+        f = sys.stdin if steps_filename == '-' else open(steps_filename)  # noqa: SIM115
+        try:
+            steps = [shlex.split(line, comments=True) for line in f]
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+        return [step for step in steps if step]
+
+    @staticmethod
+    def resolve(command_name, args):
+        """Find the command of a step.
+
+        Returns:
+          the command names, the command and its arguments
+        """
+        command = admin.NagareCommands(name=command_name, entry_points='nagare.commands')
+        names = (command_name,)
+
+        while isinstance(command, commands.Commands) or getattr(command, 'is_group', False):
+            if not args:
+                raise commands.ArgumentError('sub-command missing after `{}`'.format(' '.join(names)))
+
+            name, args = args[0], args[1:]
+            sub_commands = command.command if isinstance(command, admin.LazyCommand) else command
+            command = sub_commands.get(name)
+            if command is None:
+                raise commands.ArgumentError('unknown command `{}`'.format(' '.join(names + (name,))))
+
+            names += (name,)
+
+        if isinstance(command, admin.LazyCommand):
+            command = command.command
+
+        return names, command, args
+
+    def run_step(self, services, config_filename, command_name, args):
+        names, command, args = self.resolve(command_name, args)
+
+        if command.WITH_CONFIG_FILENAME:
+            if any(os.path.abspath(os.path.expanduser(arg)) == config_filename for arg in args):
+                raise commands.ArgumentError(
+                    'the configuration file is appended by `batch`, remove it from `{}`'.format(' '.join(names))
+                )
+
+            args = args + [config_filename]
+
+        parser = command._create_parser(' '.join(names))
+        command.set_arguments(parser)
+        arguments = command.parse(parser, args)
+
+        if type(command)._run is not admin.Command._run:
+            return command._run(names, **arguments)
+
+        arguments.pop('config_filename', None)
+
+        publisher = services.get('publisher')
+        if command.WITH_STARTED_SERVICES and publisher and not self.app_created:
+            services(publisher.create_app)
+            self.app_created = True
+
+        return admin.run_coroutine(services, services(command.run, **arguments))
+
+    def _run(self, command_names, steps_filename, keep_going, config_filename=None, **arguments):
+        steps = self.read_steps(steps_filename)
+
+        config = self.load_config(config_filename)
+        services, self.app_created = self._load_services(config, config_filename)
+
+        command_name = command_names[0] if command_names else 'nagare'
+
+        results = []
+        status = 0
+        for args in steps:
+            start = time.perf_counter()
+            try:
+                step_status = self.run_step(services, config_filename, command_name, args) or 0
+            except commands.ArgumentError as e:
+                print(e, file=sys.stderr)
+                step_status = -2
+            except SystemExit as e:
+                # Help or argparse errors
+                step_status = main.exit_status(e.code)
+            except Exception as e:
+                print('{}: {}'.format(e.__class__.__name__, e), file=sys.stderr)
+                step_status = -1
+
+            results.append((' '.join(args), step_status, time.perf_counter() - start))
+
+            if step_status:
+                status = step_status
+                if not keep_going:
+                    break
+
+        for args in steps[len(results) :]:
+            results.append((' '.join(args), None, None))
+
+        reporter = Reporter(
+            (
+                ('Command', lambda args, status, duration: args, True),
+                ('Status', lambda args, status, duration: 'skipped' if status is None else str(status), False),
+                (
+                    'Time (ms)',
+                    lambda args, status, duration: '' if duration is None else '%.1f' % (duration * 1000),
+                    False,
+                ),
+            )
+        )
+        with admin.Banner(file=sys.stderr, buffered=True) as display:
+            display('')
+            reporter.report({'command', 'status', 'time (ms)'}, results, False, display, 0)
+
+        return status
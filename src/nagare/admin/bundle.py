@@ -0,0 +1,259 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+"""Self-contained bundle of an application and its Nagare plugins.
+
+The bundle is a directory or a zipapp (``.pyz`` output) with:
+
+  - the files of the distributions, their bytecode precompiled
+  - the entry points registry and the commands index, baked into the ``nagare_bundle_index`` module
+  - a ``__main__.py`` launching ``nagare`` from the baked index, without reading any distribution metadata
+
+It is launched with ``python <bundle> <command> ...``
+"""
+
+import os
+import re
+import sys
+import shutil
+import zipapp
+import tempfile
+import compileall
+import importlib.util
+
+from nagare.admin import admin, index
+
+BUNDLE_INDEX_MODULE = 'nagare_bundle_index'
+
+BUNDLE_MAIN = """import sys
+
+import {module}
+from nagare.admin import index, main
+
+index.use_bundle({module}.DATA)
+sys.exit(main.run('nagare', *sys.argv[1:]))
+""".format(module=BUNDLE_INDEX_MODULE)
+
+REQUIREMENT_RE = re.compile(r'\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*([^;]*)(?:;(.*))?')
+
+
+def normalize(name):
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def find_distributions(names):
+    """Distributions of the names and all their requirements.
+
+    The requirements only activated by an ``extra`` are ignored.
+    """
+    installed = {normalize(name): dist for name, dist in index.get_registry().distributions.items()}
+
+    distributions = {}
+    names = list(names)
+    while names:
+        name = normalize(names.pop())
+        dist = installed.get(name)
+        if (dist is None) or (name in distributions):
+            continue
+
+        distributions[name] = dist
+        for requirement in dist.requires or ():
+            match = REQUIREMENT_RE.match(requirement)
+            if match and ('extra' not in (match.group(3) or '')):
+                names.append(match.group(1))
+
+    return list(distributions.values())
+
+
+def top_level_names(dist):
+    """Top level modules and packages of a distribution."""
+    names = (dist.read_text('top_level.txt') or '').split()
+    names += [entry_point.value.split(':')[0].split('.')[0].strip() for entry_point in dist.entry_points]
+
+    return sorted(set(names) or {normalize(dist.metadata['name']).replace('-', '_')})
+
+
+def module_files(name):
+    """Generate the ``(source, destination)`` of the files of a top level module or package."""
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        spec = None
+
+    if spec is None:
+        return
+
+    if spec.submodule_search_locations:
+        for location in spec.submodule_search_locations:
+            for path, dirs, files in os.walk(location):
+                dirs[:] = [d for d in dirs if d != '__pycache__' and not d.endswith(('.egg-info', '.dist-info'))]
+                for filename in files:
+                    if not filename.endswith(('.pyc', '.pyo')):
+                        filename = os.path.join(path, filename)
+                        yield filename, os.path.join(name, os.path.relpath(filename, location))
+    elif spec.origin and os.path.isfile(spec.origin):
+        yield spec.origin, os.path.basename(spec.origin)
+
+
+def distribution_files(dist):
+    """Generate the ``(source, destination)`` of the files of a distribution.
+
+    The files are listed from the distribution ``RECORD``. The packages of
+    the editable distributions and of the distributions without ``RECORD``
+    are copied from their import location.
+    """
+    files = dist.files
+    editable = False
+
+    for file in files or ():
+        if (file.parts[0] == '..') or ('__pycache__' in file.parts) or (file.suffix in ('.pyc', '.pyo')):
+            continue
+
+        if (file.suffix == '.pth') or file.name.startswith('__editable__'):
+            editable = True
+            continue
+
+        yield str(dist.locate_file(file)), str(file)
+
+    if files is None:
+        dist_info = getattr(dist, '_path', None)
+        if dist_info is not None:
+            for filename in os.listdir(str(dist_info)):
+                yield os.path.join(str(dist_info), filename), os.path.join(dist_info.name, filename)
+
+    if editable or (files is None):
+        for name in top_level_names(dist):
+            yield from module_files(name)
+
+
+def bake_index(registry):
+    """Registry and index data, with the descriptions and the arguments of all the commands."""
+    entries = [
+        [entry_point.name, entry_point.value, entry_point.group]
+        for _, entry_point in registry.iter_groups('nagare.commands')
+    ]
+
+    baked_index = index.BakedIndex({'version': index.INDEX_VERSION})
+    baked_index.data['commands'] = index.build_commands_tree(index.create_entry_point(entry) for entry in entries)
+
+    for entry in entries:
+        try:
+            baked_index.arguments_manifest(entry)
+            baked_index.descriptions([entry])
+        except Exception as e:
+            print('Command <{}> not indexed: {}'.format(entry[1], e), file=sys.stderr)
+
+    return {'registry': registry.dump(), 'index': baked_index.data}
+
+
+class Bundle(admin.Command):
+    DESC = 'package applications and their Nagare plugins with a baked entry points index'
+    WITH_CONFIG_FILENAME = False
+
+    def set_arguments(self, parser):
+        parser.add_argument(
+            '-p',
+            '--package',
+            action='append',
+            dest='packages',
+            default=[],
+            help='distribution to bundle, with its requirements (default: the distributions of the applications)',
+        )
+        parser.add_argument(
+            '-O',
+            '--optimize',
+            action='count',
+            default=0,
+            help='bytecode optimization level, a directory bundle must be run with the same Python `-O` option',
+        )
+        parser.add_argument(
+            '--python', default='/usr/bin/env python3', help='interpreter of the zipapp (default: `%(default)s`)'
+        )
+        parser.add_argument('--force', action='store_true', help='overwrite an existing bundle')
+        parser.add_argument('output', help='bundle directory, or zipapp if its name ends with `.pyz`')
+
+        super().set_arguments(parser)
+
+    @staticmethod
+    def copy(distributions, path):
+        nb_files = 0
+        extensions = []
+
+        for dist in distributions:
+            for src, dst in distribution_files(dist):
+                dst = os.path.join(path, dst)
+                if os.path.isfile(src) and not os.path.exists(dst):
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    shutil.copy2(src, dst)
+                    nb_files += 1
+
+                    if dst.endswith(('.so', '.pyd')):
+                        extensions.append(dst)
+
+        return nb_files, extensions
+
+    def _run(self, command_names, packages, optimize, python, force, output):
+        output = os.path.abspath(output)
+        zip_output = output.endswith('.pyz')
+
+        registry = index.get_registry()
+        if not packages:
+            packages = [dist.metadata['name'] for dist, _, _ in registry.iter_entry_points('nagare.applications')]
+
+        installed = set(map(normalize, registry.distributions))
+        unknowns = [package for package in packages if normalize(package) not in installed]
+        if unknowns:
+            print('Unknown distributions: {}'.format(', '.join(unknowns)), file=sys.stderr)
+            return -1
+
+        if os.path.exists(output):
+            if not force:
+                print('<{}> already exists, use `--force` to overwrite it'.format(output), file=sys.stderr)
+                return -1
+
+            if os.path.isdir(output):
+                if not os.path.isfile(os.path.join(output, BUNDLE_INDEX_MODULE + '.py')):
+                    print('<{}> is not a bundle directory, not overwritten'.format(output), file=sys.stderr)
+                    return -1
+
+                shutil.rmtree(output)
+            else:
+                os.remove(output)
+
+        distributions = find_distributions(packages + ['nagare-commands-base'])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bundle') if zip_output else output
+            os.makedirs(path)
+
+            nb_files, extensions = self.copy(distributions, path)
+
+            with open(os.path.join(path, BUNDLE_INDEX_MODULE + '.py'), 'w') as f:
+                f.write('DATA = {!r}\n'.format(bake_index(index.Registry(distributions))))
+
+            with open(os.path.join(path, '__main__.py'), 'w') as f:
+                f.write(BUNDLE_MAIN)
+
+            # Zipimport only loads the ``.pyc`` files next to their sources
+            compileall.compile_dir(path, quiet=1, legacy=zip_output, optimize=optimize)
+
+            if zip_output:
+                zipapp.create_archive(path, output, interpreter=python)
+
+        print('Bundle <{}>: {} distributions, {} files'.format(output, len(distributions), nb_files), file=sys.stderr)
+        if zip_output and extensions:
+            print(
+                'Warning: the zipapp contains extension modules that can not be imported from a zip, '
+                'bundle into a directory instead:',
+                file=sys.stderr,
+            )
+            for extension in extensions:
+                print('  ' + os.path.relpath(extension, path), file=sys.stderr)
+
+        return 0
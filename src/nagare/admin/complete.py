@@ -8,13 +8,12 @@
 # --
 
 import os
-import itertools
 from argparse import ArgumentParser
-from importlib import metadata
-from collections import defaultdict
 
 import argcomplete
 
+from nagare.admin import index
+
 
 def FilesCompleter():
     return lambda **kw: (
@@ -24,9 +23,13 @@ def FilesCompleter():
 
 class ActiveParsers(list):
     def append(self, parser):
-        entry_point = getattr(parser, 'entry_point', None)
-        if entry_point is not None:
-            entry_point.load()('', None).set_arguments(parser)
+        entry = getattr(parser, 'entry', None)
+        if entry is not None:
+            manifest = index.get_index().arguments_manifest(entry)
+            if manifest is None:
+                index.create_entry_point(entry).load()('', None).set_arguments(parser)
+            else:
+                index.manifest_to_parser(manifest, parser)
 
         return super().append(parser)
 
@@ -62,29 +65,16 @@ class CompletionFinder(argcomplete.CompletionFinder):
 
 
 def complete():
-    all_commands = defaultdict(dict)
-
-    entry_points = metadata.entry_points()
-    if hasattr(entry_points, 'values'):
-        entry_points = itertools.chain(*entry_points.values())
-
-    for entry in entry_points:
-        if not entry.group.startswith('nagare.commands'):
-            continue
-
-        command = all_commands
-        for command_name in entry.group.split('.')[2:] + [entry.name]:
-            command = command.setdefault(command_name, defaultdict(dict, _entry=entry))
+    all_commands = index.get_index().commands_tree()
 
     def add_sub_parsers(parser, all_commands):
         subparsers = parser.add_subparsers()
-        for command_name, command in all_commands.items():
-            if not command_name.startswith('_'):
-                subparser = subparsers.add_parser(command_name)
-                if len(command) > 1:
-                    add_sub_parsers(subparser, command)
-                else:
-                    subparser.entry_point = command['_entry']
+        for command_name, command in index.sub_commands(all_commands).items():
+            subparser = subparsers.add_parser(command_name)
+            if index.sub_commands(command):
+                add_sub_parsers(subparser, command)
+            elif '_entry' in command:
+                subparser.entry = command['_entry']
 
         return parser
 
@@ -8,10 +8,71 @@
 # --
 
 import os
+import re
+import json
+import hashlib
 
-import argcomplete
+from nagare.admin import admin, index
 
-from nagare.admin import admin
+SIGNATURE = '# nagare-completion-signature: {}'
+SIGNATURE_RE = re.compile(r'^# nagare-completion-signature: (\w+)$', re.MULTILINE)
+
+BASH_FUNCTION = """
+_nagare_static_words() {{
+    case "$1" in
+{cases}
+        *) return 1 ;;
+    esac
+}}
+
+_nagare_static() {{
+    local cur="${{COMP_WORDS[COMP_CWORD]}}" path="" subs words i
+
+    _nagare_static_words "" || return
+    for ((i=1; i<COMP_CWORD; i++)); do
+        case "${{COMP_WORDS[i]}}" in
+            -*) continue ;;
+        esac
+
+        case " $subs " in
+            *" ${{COMP_WORDS[i]}} "*)
+                path="${{path:+$path }}${{COMP_WORDS[i]}}"
+                _nagare_static_words "$path" || return
+                ;;
+            *) break ;;
+        esac
+    done
+
+    COMPREPLY=($(compgen -W "$words" -- "$cur"))
+}}
+complete -o default -F _nagare_static nagare nagare-admin
+"""
+
+FISH_FUNCTION = """
+function __nagare_static_subs
+    switch "$argv[1]"
+{cases}
+    end
+end
+
+function __nagare_static_at
+    set -l words (commandline -opc)
+    set -e words[1]
+    set -l path ''
+    set -l subs (string split ' ' -- (__nagare_static_subs ''))
+    for word in $words
+        string match -q -- '-*' $word; and continue
+        contains -- $word $subs; or break
+        set path (string trim -- "$path $word")
+        set subs (string split ' ' -- (__nagare_static_subs "$path"))
+    end
+    test "$path" = "$argv[1]"
+end
+"""
+
+
+def fish_quote(s):
+    return "'" + s.replace('\\', '\\\\').replace("'", "\\'") + "'"
 
 
 class Completion(admin.Command):
@@ -36,12 +97,115 @@ class Completion(admin.Command):
             dest='shell',
             help='generate completion code for PowerShell',
         )
+        parser.add_argument(
+            '-s',
+            '--static',
+            action='store_true',
+            help='generate a pre-rendered completion code, not calling Python (Bash, Zsh and Fish only)',
+        )
+        parser.add_argument(
+            '-c', '--check', metavar='SCRIPT', help='check if a pre-rendered completion code is up to date'
+        )
 
         super().set_arguments(parser)
 
-    def _run(self, names, shell):
+    @staticmethod
+    def walk_commands(command, entry_points_index, path=()):
+        """Generate the ``(path, sub-commands names, arguments manifest)`` of all the commands."""
+        sub_commands = index.sub_commands(command)
+        if sub_commands:
+            yield path, sorted(sub_commands), []
+
+            for name, sub_command in sorted(sub_commands.items()):
+                yield from Completion.walk_commands(sub_command, entry_points_index, path + (name,))
+        elif '_entry' in command:
+            yield path, [], entry_points_index.arguments_manifest(command['_entry']) or []
+
+    @staticmethod
+    def signature(commands):
+        return hashlib.sha1(json.dumps(commands, sort_keys=True).encode('utf-8')).hexdigest()  # noqa: S324
+
+    @staticmethod
+    def generate_bash(commands):
+        cases = []
+        for path, sub_commands, manifest in commands:
+            words = sub_commands + [option for spec in manifest for option in spec['option_strings']]
+            cases.append(
+                '        "{}") subs="{}" words="{}" ;;'.format(' '.join(path), ' '.join(sub_commands), ' '.join(words))
+            )
+
+        return BASH_FUNCTION.format(cases='\n'.join(cases))
+
+    def generate_zsh(self, commands):
+        return 'autoload -U +X bashcompinit && bashcompinit\n' + self.generate_bash(commands)
+
+    @staticmethod
+    def generate_fish(commands):
+        cases = [
+            '        case {}\n            echo {}'.format(
+                fish_quote(' '.join(path)), fish_quote(' '.join(sub_commands))
+            )
+            for path, sub_commands, _ in commands
+            if sub_commands
+        ]
+        lines = [FISH_FUNCTION.format(cases='\n'.join(cases))]
+
+        for path, sub_commands, manifest in commands:
+            condition = fish_quote('__nagare_static_at "{}"'.format(' '.join(path)))
+
+            for command in ('nagare', 'nagare-admin'):
+                if sub_commands:
+                    lines.append(
+                        'complete -c {} -f -n {} -a {}'.format(command, condition, fish_quote(' '.join(sub_commands)))
+                    )
+
+                for spec in manifest:
+                    options = ''.join(
+                        ' -l ' + option[2:] if option.startswith('--') else ' -s ' + option[1:]
+                        for option in spec['option_strings']
+                    )
+                    if options:
+                        description = ' -d ' + fish_quote(spec['help']) if spec.get('help') else ''
+                        lines.append('complete -c {} -n {}{}{}'.format(command, condition, options, description))
+
+        return '\n'.join(lines) + '\n'
+
+    def check(self, script):
+        try:
+            with open(script) as f:
+                signature = SIGNATURE_RE.search(f.read())
+        except OSError as e:
+            print(e)
+            return -1
+
+        commands = list(self.walk_commands(index.build_commands_tree(), index.get_index()))
+        if signature and (signature.group(1) == self.signature(commands)):
+            print('Completion code <{}> is up to date'.format(script))
+            return 0
+
+        print('Completion code <{}> is stale, regenerate it with `nagare completion --static`'.format(script))
+        return 1
+
+    def _run(self, names, shell, static, check):
+        if check:
+            return self.check(check)
+
         shell = shell or os.path.basename(os.environ.get('SHELL', '')) or 'bash'
 
+        if static:
+            generate = getattr(self, 'generate_' + shell, None)
+            if generate is None:
+                print('No pre-rendered completion code for {}'.format(shell))
+                return -1
+
+            commands = list(self.walk_commands(index.build_commands_tree(), index.get_index()))
+            print(SIGNATURE.format(self.signature(commands)))
+            print(generate(commands))
+
+            return 0
+
+        import argcomplete
+
         shell_code = argcomplete.shellcode(['nagare', 'nagare-admin'], shell=shell)
         lines = [
             '            local IFS=" "; _alternative "$completions"'
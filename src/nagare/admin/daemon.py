@@ -0,0 +1,65 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+import os
+import sys
+
+from nagare.admin import admin, index, zygote, preload
+
+
+class Daemon(admin.Command):
+    DESC = 'warm resident process running the commands sent with `NAGARE_DAEMON=<socket>`'
+    WITH_CONFIG_FILENAME = False
+
+    def set_arguments(self, parser):
+        parser.add_argument(
+            '-s',
+            '--socket',
+            default=os.environ.get('NAGARE_DAEMON'),
+            help='path of the Unix socket (default: `$NAGARE_DAEMON` or in the user cache directory)',
+        )
+        parser.add_argument(
+            'config_filenames', nargs='*', help='configuration files to preload (the daemon restarts on changes)'
+        )
+
+        super().set_arguments(parser)
+
+    @staticmethod
+    def preload_configs(config_filenames):
+        """Import the commands and services entry points, and run the preload stage of the configurations."""
+        for _, entry_point in index.get_registry().iter_groups(('nagare.commands', 'nagare.services')):
+            try:
+                entry_point.load()
+            except Exception as e:
+                print('Entry point <{}> not preloaded: {}'.format(entry_point.value, e), file=sys.stderr)
+
+        for config_filename in config_filenames:
+            config = admin.Command.load_config(config_filename)
+            preload.preload(config, config_filename, admin.Command)
+
+    @staticmethod
+    def mtimes(filenames):
+        return [os.stat(filename).st_mtime_ns if os.path.exists(filename) else None for filename in filenames]
+
+    def _run(self, command_names, socket, config_filenames):
+        config_filenames = [os.path.abspath(config_filename) for config_filename in config_filenames]
+        watched_filenames = config_filenames + [self.get_user_data_file()[1]]
+
+        fingerprint = index.get_index().fingerprint
+        mtimes = self.mtimes(watched_filenames)
+
+        def is_stale():
+            return (index.fingerprint() != fingerprint) or (self.mtimes(watched_filenames) != mtimes)
+
+        self.preload_configs(config_filenames)
+
+        zygote.serve(socket, is_stale, lambda path: print('Listening on', path, file=sys.stderr))
+
+        print('Installed packages or configuration files changed, restarting', file=sys.stderr)
+        os.execv(sys.executable, [sys.executable] + sys.argv)  # noqa: S606
@@ -0,0 +1,379 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+"""On-disk index of the installed entry points.
+
+The index is stored as a JSON file in the user cache directory and is
+invalidated as soon as a ``sys.path`` directory or one of the distribution
+metadata directories it contains is modified. ``importlib.metadata`` is only
+imported when the distributions are actually read, not on a warm index lookup.
+
+In a bundle created by ``nagare bundle``, the registry and the index are
+baked into the bundle and no distribution metadata is read at startup.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import contextlib
+from collections import defaultdict
+
+INDEX_VERSION = 1
+METADATA_SUFFIXES = ('.dist-info', '.egg-info', '.egg-link', '.pth')
+
+
+def get_cache_dir():
+    cache_dir = os.environ.get('NAGARE_CACHE_DIR')
+    if cache_dir is None:
+        import appdirs
+
+        cache_dir = appdirs.user_cache_dir('nagare')
+
+    return cache_dir
+
+
+def fingerprint(paths=None):
+    """Signature of the installed distributions.
+
+    Only the ``sys.path`` directories and the metadata directories they
+    contain are stat'ed, no distribution metadata is read.
+    """
+    signature = hashlib.sha1(sys.executable.encode('utf-8'))  # noqa: S324
+
+    for path in sys.path if paths is None else paths:
+        path = os.path.abspath(path or os.curdir)
+        try:
+            signature.update('{}:{}'.format(path, os.stat(path).st_mtime_ns).encode('utf-8'))
+
+            if os.path.isdir(path):
+                with os.scandir(path) as entries:
+                    for entry in sorted(entries, key=lambda entry: entry.name):
+                        if entry.name.endswith(METADATA_SUFFIXES):
+                            signature.update(
+                                '{}:{}'.format(entry.name, entry.stat().st_mtime_ns).encode('utf-8', 'replace')
+                            )
+        except OSError:
+            pass
+
+    return signature.hexdigest()
+
+
+class Registry:
+    """Process-wide registry of the installed distributions and their entry points.
+
+    Built in a single pass over the distributions metadata, the entry points
+    are indexed by group.
+    """
+
+    def __init__(self, distributions=None):
+        from importlib import metadata
+
+        self.distributions = {}
+        self.groups = defaultdict(list)
+
+        for dist in metadata.distributions() if distributions is None else distributions:
+            name = dist.metadata['name']
+            if not name or (name in self.distributions):
+                continue
+
+            self.distributions[name] = dist
+            for entry_point in dist.entry_points:
+                self.groups[entry_point.group].append((dist, entry_point))
+
+    @classmethod
+    def load(cls, data):
+        """Create a registry from the data of ``dump()``, without reading any distribution metadata."""
+        registry = cls(())
+
+        for name, entries in data.items():
+            dist = registry.distributions[name] = LazyDistribution(name)
+            for entry in entries:
+                registry.groups[entry[2]].append((dist, create_entry_point(entry, dist)))
+
+        return registry
+
+    def dump(self):
+        """Distributions names and entry points, as JSON serializable data."""
+        return {
+            name: [[entry_point.name, entry_point.value, entry_point.group] for entry_point in dist.entry_points]
+            for name, dist in self.distributions.items()
+        }
+
+    def iter_entry_points(self, group):
+        """Generate the ``(dist, name, entry_point)`` of a group, as ``Plugins.iter_entry_points()``."""
+        return ((dist, entry_point.name, entry_point) for dist, entry_point in self.groups.get(group, ()))
+
+    def iter_groups(self, prefix):
+        """Generate the ``(dist, entry_point)`` of all the groups starting with a prefix."""
+        for group, entry_points in self.groups.items():
+            if group.startswith(prefix):
+                yield from entry_points
+
+
+REGISTRY = None
+
+
+def get_registry():
+    """The process-wide entry points registry, built on first use."""
+    global REGISTRY
+
+    if REGISTRY is None:
+        REGISTRY = Registry()
+
+    return REGISTRY
+
+
+def build_commands_tree(entry_points=None):
+    """Build the tree of the ``nagare.commands*`` entry points.
+
+    Each node is a dictionary of its sub-commands, the ``_entry`` key giving
+    the ``(name, value, group)`` of the node entry point.
+    """
+    tree = {}
+
+    if entry_points is None:
+        entry_points = (entry_point for _, entry_point in get_registry().iter_groups('nagare.commands'))
+
+    for entry in entry_points:
+        if not entry.group.startswith('nagare.commands'):
+            continue
+
+        command = tree
+        for command_name in entry.group.split('.')[2:] + [entry.name]:
+            command = command.setdefault(command_name, {})
+
+        command['_entry'] = [entry.name, entry.value, entry.group]
+
+    return tree
+
+
+def sub_commands(command):
+    return {name: sub_command for name, sub_command in command.items() if not name.startswith('_')}
+
+
+class LazyDistribution:
+    """Distribution only looked up when one of its attributes is accessed."""
+
+    def __init__(self, name):
+        self.name = name
+        self._dist = None
+
+    def __getattr__(self, name):
+        if self._dist is None:
+            from importlib import metadata
+
+            self._dist = metadata.distribution(self.name)
+
+        return getattr(self._dist, name)
+
+
+def create_entry_point(entry, dist=None):
+    from importlib import metadata
+
+    entry_point = metadata.EntryPoint(*entry)
+    if dist is not None:
+        vars(entry_point).update(dist=dist)
+
+    return entry_point
+
+
+def entry_key(entry):
+    name, _, group = entry
+    return group + ':' + name
+
+
+def parser_to_manifest(parser):
+    """Describe the arguments of a parser as JSON serializable data.
+
+    Returns:
+      the list of the arguments specifications or ``None`` if an argument can't
+      be described without the command code (custom completer or choices)
+    """
+    manifest = []
+
+    for action in parser._actions:
+        if isinstance(action, argparse._HelpAction):
+            continue
+
+        if getattr(action, 'completer', None) is not None:
+            return None
+
+        spec = {'option_strings': list(action.option_strings), 'dest': action.dest, 'nargs': action.nargs}
+
+        if action.help and (action.help != argparse.SUPPRESS):
+            spec['help'] = str(action.help)
+
+        if action.choices is not None:
+            choices = list(action.choices)
+            if not all(isinstance(choice, str) for choice in choices):
+                return None
+
+            spec['choices'] = choices
+
+        manifest.append(spec)
+
+    return manifest
+
+
+def manifest_to_parser(manifest, parser):
+    """Add the arguments described by a manifest to a parser."""
+    for spec in manifest:
+        kw = {'help': spec.get('help')}
+        if 'choices' in spec:
+            kw['choices'] = spec['choices']
+
+        if spec['nargs'] == 0:
+            kw['action'] = 'store_const'
+            kw['const'] = None
+        elif spec['nargs'] is not None:
+            kw['nargs'] = spec['nargs']
+
+        if spec['option_strings']:
+            parser.add_argument(*spec['option_strings'], dest=spec['dest'], **kw)
+        else:
+            parser.add_argument(spec['dest'], **kw)
+
+    return parser
+
+
+class Index:
+    def __init__(self, filename=None):
+        if filename is None:
+            key = hashlib.sha1(  # noqa: S324
+                os.pathsep.join([sys.executable] + sys.path).encode('utf-8', 'replace')
+            ).hexdigest()
+            filename = os.path.join(get_cache_dir(), 'index-{}.json'.format(key[:16]))
+
+        self.filename = filename
+        self._fingerprint = None
+        self._data = None
+
+    @property
+    def fingerprint(self):
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint()
+
+        return self._fingerprint
+
+    @property
+    def data(self):
+        if self._data is None:
+            data = {}
+            try:
+                with open(self.filename) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+            if (data.get('version') != INDEX_VERSION) or (data.get('fingerprint') != self.fingerprint):
+                data = {'version': INDEX_VERSION, 'fingerprint': self.fingerprint}
+
+            self._data = data
+
+        return self._data
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+
+            tmp_filename = '{}.{}'.format(self.filename, os.getpid())
+            with open(tmp_filename, 'w') as f:
+                json.dump(self.data, f)
+
+            os.replace(tmp_filename, self.filename)
+        except OSError:
+            pass
+
+    def get(self, key, builder):
+        value = self.data.get(key)
+        if value is None:
+            value = self.data[key] = builder()
+            self.save()
+
+        return value
+
+    def get_item(self, key, item, builder):
+        return self.get_items(key, {item: builder})[item]
+
+    def get_items(self, key, builders):
+        """Get several items of a key, building and saving the missing ones at once."""
+        items = self.data.setdefault(key, {})
+
+        missings = {item: builder for item, builder in builders.items() if item not in items}
+        if missings:
+            items.update((item, builder()) for item, builder in missings.items())
+            self.save()
+
+        return {item: items[item] for item in builders}
+
+    def clear(self):
+        self._fingerprint = self._data = None
+        with contextlib.suppress(OSError):
+            os.remove(self.filename)
+
+    def commands_tree(self):
+        return self.get('commands', build_commands_tree)
+
+    def arguments_manifest(self, entry):
+        """Arguments manifest of a command, the command is loaded only the first time."""
+
+        def build_manifest():
+            get_arguments_manifest = getattr(create_entry_point(entry).load(), 'get_arguments_manifest', None)
+            return get_arguments_manifest and get_arguments_manifest()
+
+        return self.get_item('arguments', entry_key(entry), build_manifest)
+
+    def descriptions(self, entries):
+        """Descriptions of commands, the commands not yet indexed are loaded."""
+
+        def build_description(entry):
+            return lambda: str(getattr(create_entry_point(entry).load(), 'DESC', ''))
+
+        descriptions = self.get_items('descriptions', {entry_key(entry): build_description(entry) for entry in entries})
+        return [descriptions[entry_key(entry)] for entry in entries]
+
+
+class BakedIndex(Index):
+    """Read-only index, baked into a bundle and never invalidated.
+
+    The missing items are still built on demand, but only kept in memory.
+    """
+
+    def __init__(self, data):
+        super().__init__(filename='')
+        self._data = data
+
+    def save(self):
+        pass
+
+    def clear(self):
+        pass
+
+
+INDEX = None
+
+
+def use_bundle(data):
+    """Serve the registry and the index from the data baked by ``nagare bundle``."""
+    global REGISTRY, INDEX
+
+    REGISTRY = Registry.load(data['registry'])
+    INDEX = BakedIndex(data['index'])
+
+
+def get_index():
+    """The process-wide index."""
+    global INDEX
+
+    if INDEX is None:
+        INDEX = Index()
+
+    return INDEX
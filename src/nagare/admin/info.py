@@ -8,14 +8,130 @@
 # --
 
 import sys
-from importlib import metadata
+import json
+import functools
+import itertools
+import subprocess
+from concurrent import futures
 from collections import defaultdict
 
-from nagare.admin import admin
+from nagare.admin import admin, index
 from nagare.packaging import Distribution
-from nagare.services.services import Services
 from nagare.services.reporters import Reporter, PackagesReporter
 
+PROFILED_GROUPS = ('nagare.commands', 'nagare.services', 'nagare.applications')
+
+IMPORT_PROFILE = """
+import sys, json, time
+from importlib import metadata
+
+from nagare.admin.preload import get_rss
+
+entry_point = metadata.EntryPoint(*sys.argv[1:])
+nb_modules = len(sys.modules)
+memory = get_rss()
+start = time.perf_counter()
+entry_point.load()
+duration = time.perf_counter() - start
+
+print(json.dumps({
+    'duration': duration,
+    'modules': len(sys.modules) - nb_modules,
+    'memory': get_rss() - memory
+}))
+"""
+
+APPLICATION_LOADING = """
+import sys, json
+from importlib import metadata
+
+cls = metadata.EntryPoint(*sys.argv[1:]).load()
+print(json.dumps({
+    'class': cls.__module__ + '.' + cls.__name__,
+    'class_location': sys.modules[cls.__module__].__file__
+}))
+"""
+
+GENERAL_COLUMNS = (
+    ('Implementation', lambda implementation, version, user_config, found: implementation, True),
+    ('Version', lambda implementation, version, user_config, found: version, True),
+    ('User configuration', lambda implementation, version, user_config, found: user_config, True),
+    ('Found', lambda implementation, version, user_config, found: found, True),
+)
+
+SERVICES_COLUMNS = (
+    ('Name', lambda level, name, e, c: ' ' * (4 * level) + name, True),
+    ('Order', lambda l, n, e, cls: str(cls.LOAD_PRIORITY), False),
+    ('Package', lambda l, n, entry_point, c: entry_point.dist.metadata['name'], True),
+    (
+        'Location',
+        lambda l, n, e, cls: '{}:{}'.format(sys.modules[cls.__module__].__file__, cls.__name__),
+        True,
+    ),
+)
+
+# The tree level is a field of the streamed records, not an indentation of the name
+STREAMED_SERVICES_COLUMNS = (
+    ('Level', lambda level, n, e, c: level, True),
+    ('Name', lambda l, name, e, c: name, True),
+) + SERVICES_COLUMNS[1:]
+
+APPLICATIONS_COLUMNS = (
+    ('Name', lambda dist, name, entry_point, infos: name, True),
+    ('Class', lambda dist, name, entry_points, infos: infos.get('class', ''), True),
+    ('Package', lambda dist, name, entry_point, infos: dist.metadata['name'], True),
+    ('Version', lambda dist, name, entry_point, infos: dist.version, True),
+    ('Class location', lambda dist, name, entry_point, infos: infos.get('class_location', ''), True),
+    (
+        'Package location',
+        lambda dist, name, entry_point, infos: (
+            Distribution(dist).editable_project_location or str(dist.locate_file(''))
+        ),
+        True,
+    ),
+    ('Error', lambda dist, name, entry_point, infos: infos.get('error', ''), True),
+)
+
+PROFILE_COLUMNS = (
+    ('Group', lambda profile: profile['group'], True),
+    ('Name', lambda profile: profile['name'], True),
+    (
+        'Time (ms)',
+        lambda profile: '%.1f' % (profile['duration'] * 1000) if 'duration' in profile else '-',
+        False,
+    ),
+    ('Modules', lambda profile: str(profile.get('modules', '-')), False),
+    (
+        'Memory (KB)',
+        lambda profile: '-' if profile.get('memory') is None else str(profile['memory'] // 1024),
+        False,
+    ),
+    ('Error', lambda profile: profile.get('error', ''), True),
+)
+
+
+def run_entry_point(script, entry_point, timeout=None):
+    """Run a script in a fresh interpreter, with the ``name``, ``value`` and ``group`` of an entry point as arguments.
+
+    Returns:
+      the JSON object written by the script, or an error message
+    """
+    try:
+        process = subprocess.run(  # noqa: S603
+            [sys.executable, '-c', script, entry_point.name, entry_point.value, entry_point.group],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return {'error': 'not loaded after {}s'.format(timeout)}
+
+    if process.returncode:
+        error = process.stderr.strip().splitlines()
+        return {'error': error[-1] if error else 'exit code {}'.format(process.returncode)}
+
+    return json.loads(process.stdout)
+
 
 class Info(admin.Command):
     DESC = 'display runtime informations'
@@ -46,141 +162,272 @@ class Info(admin.Command):
 
         parser.add_argument('-l', '--location', action='store_true', help='display packages location')
 
+        parser.add_argument(
+            '-m',
+            '--metadata-only',
+            action='store_true',
+            help='display the applications from their packages metadata, without loading their classes',
+        )
+
+        parser.add_argument(
+            '-t',
+            '--timeout',
+            type=float,
+            default=30,
+            help='maximum time to load an application or profile an entry point, in seconds (default: 30)',
+        )
+
         parser.add_argument(
             '-r', '--registrations', action='store_true', help='display the packages services are registered by'
         )
 
+        parser.add_argument(
+            '--startup-profile',
+            action='store_true',
+            help='display the import cost of the commands, services and applications entry points',
+        )
+
+        parser.add_argument(
+            '-f',
+            '--format',
+            choices=('table', 'json', 'jsonl'),
+            default='table',
+            dest='output_format',
+            help='output format. With `json` and `jsonl`, the rows are streamed as they are produced',
+        )
+
     def _create_services(self, *args, **kw):
-        return self.SERVICES_FACTORY()
+        return self.get_services_factory()()
+
+    @staticmethod
+    def profile_entry_point(entry_point, timeout=None):
+        """Import an entry point in a fresh interpreter.
+
+        Returns:
+          the import duration, the number of imported modules and the resident memory delta (bytes),
+          or an error message
+        """
+        return run_entry_point(IMPORT_PROFILE, entry_point, timeout)
 
     @classmethod
-    def run(
-        cls, general_info, packages_info, services_info, applications_info, location, registrations, services_service
-    ):
-        nb_sections = general_info + packages_info + services_info + applications_info
-        if nb_sections == 0:
-            general_info = packages_info = services_info = applications_info = True
+    def profile_startup(cls, distributions, timeout=None):
+        entry_points = [entry_point for _, entry_point in distributions.iter_groups(PROFILED_GROUPS)]
 
-        implementation = getattr(sys, 'subversion', None)
-        implementation = implementation[0] if implementation else sys.implementation.name.capitalize()
+        with futures.ThreadPoolExecutor() as executor:
+            results = executor.map(functools.partial(cls.profile_entry_point, timeout=timeout), entry_points)
+            profiles = [
+                dict(result, name=entry_point.name, entry_point=entry_point.value, group=entry_point.group)
+                for entry_point, result in zip(entry_points, results)
+            ]
 
-        with admin.Banner(file=sys.stdout) as display:
-            if general_info:
-                display((implementation + ' ' + sys.version).splitlines())
-                display()
+        return sorted(profiles, key=lambda profile: profile.get('duration', float('inf')), reverse=True)
 
-                has_user_data_file, user_data_file = cls.get_user_data_file()
-                display('User configuration [%sFOUND]: ' % ('NOT ' if not has_user_data_file else ''))
-                display('')
-                display('  ' + user_data_file)
-                display('')
+    @staticmethod
+    def packages_section(distributions, location, registrations):
+        activated_columns = {'package', 'version'}
+        if location:
+            activated_columns.add('location')
 
-            if packages_info:
-                if nb_sections != 1:
-                    display('Nagare packages:')
-                    display('')
+        if registrations:
+            activated_columns.add('services')
 
-                activated_columns = {'package', 'version'}
-                if location:
-                    activated_columns.add('location')
+        services = defaultdict(list)
+        for dist, name, _ in distributions.iter_entry_points('nagare.services'):
+            services[dist.metadata['name']].append(name)
 
-                if registrations:
-                    activated_columns.add('services')
+        columns = PackagesReporter.COLUMNS + (
+            ('Services', lambda dist, *args: ', '.join(sorted(services[dist.metadata['name']])), True),
+        )
 
-                nagare_packages = {
-                    dist.metadata['name']: (dist,)
-                    for dist in metadata.distributions()
-                    if dist.metadata['name'].startswith('nagare-') or (dist.metadata['name'] == 'nagare')
-                }.values()
+        nagare_packages = (
+            (dist,)
+            for name, dist in distributions.distributions.items()
+            if name.startswith('nagare-') or (name == 'nagare')
+        )
 
-                services = defaultdict(list)
-                for dist, name, entry_point in services_service.iter_entry_points(None, 'nagare.services', {}):
-                    services[entry_point.dist.metadata['name']].append(name)
+        return PackagesReporter, columns, activated_columns, nagare_packages, True
 
-                package_reporter = PackagesReporter(
-                    PackagesReporter.COLUMNS
-                    + (('Services', lambda dist, *args: ', '.join(sorted(services[dist.metadata['name']])), True),)
-                )
-                package_reporter.report(activated_columns, nagare_packages, True, display, 0 if nb_sections == 1 else 2)
-                display('')
+    @staticmethod
+    def services_section(services_service, location, streamed=False):
+        activated_columns = {'name', 'order', 'package'}
+        if location:
+            activated_columns.add('location')
 
-            if services_info:
-                if nb_sections != 1:
-                    display('Services:')
-                    display('')
+        if streamed:
+            activated_columns.add('level')
 
-                service_reporter = Reporter(
-                    (
-                        ('Name', lambda level, name, e, c: ' ' * (4 * level) + name, True),
-                        ('Order', lambda l, n, e, cls: str(cls.LOAD_PRIORITY), False),
-                        ('Package', lambda l, n, entry_point, c: entry_point.dist.metadata['name'], True),
-                        (
-                            'Location',
-                            lambda l, n, e, cls: '{}:{}'.format(sys.modules[cls.__module__].__file__, cls.__name__),
-                            True,
-                        ),
-                    )
-                )
+        def extract_infos(plugins, level=0):
+            for plugin in plugins:
+                f, (entry, name, cls, plugin, children) = plugin
+                yield level, name, entry, cls
 
-                activated_columns = {'name', 'order', 'package'}
-                if location:
-                    activated_columns.add('location')
+                yield from extract_infos(children, level + 1)
 
-                def extract_infos(plugins, level=0):
-                    infos = []
-                    for plugin in plugins:
-                        f, (entry, name, cls, plugin, children) = plugin
-                        infos.append((level, name, entry, cls))
+        services = services_service.walk1('services', 'nagare.services', {}, {}, services_service.activated_by_default)
 
-                        for plugins in extract_infos(children, level + 1):
-                            infos.append(plugins)
+        columns = STREAMED_SERVICES_COLUMNS if streamed else SERVICES_COLUMNS
 
-                    return infos
+        return Reporter, columns, activated_columns, extract_infos(services), False
 
-                services = services_service.walk1(
-                    'services', 'nagare.services', {}, {}, services_service.activated_by_default
-                )
+    @staticmethod
+    def load_application(entry_point, timeout):
+        """Load an application class in a fresh interpreter.
 
-                service_reporter.report(
-                    activated_columns, extract_infos(services), False, display, 0 if nb_sections == 1 else 2
-                )
-                display('')
+        Returns:
+          the class name and location, or an error message
+        """
+        return run_entry_point(APPLICATION_LOADING, entry_point, timeout)
 
-            if applications_info:
-                if nb_sections != 1:
-                    display('Applications:')
-                    display('')
+    @classmethod
+    def applications_section(cls, distributions, location, metadata_only, timeout):
+        activated_columns = {'name', 'package', 'version'}
+        if not metadata_only:
+            activated_columns.update(('class', 'error'))
+
+        if location:
+            activated_columns.add('package location')
+            if not metadata_only:
+                activated_columns.add('class location')
+
+        applications = list(distributions.iter_entry_points('nagare.applications'))
+
+        def load_applications():
+            if metadata_only:
+                for dist, name, entry_point in applications:
+                    yield dist, name, entry_point, {}
+            else:
+                with futures.ThreadPoolExecutor() as executor:
+                    loadings = [
+                        executor.submit(cls.load_application, entry_point, timeout)
+                        for _, _, entry_point in applications
+                    ]
+
+                    for (dist, name, entry_point), loading in zip(applications, loadings):
+                        yield dist, name, entry_point, loading.result()
+
+        return Reporter, APPLICATIONS_COLUMNS, activated_columns, load_applications(), True
 
-                app_reporter = Reporter(
-                    (
-                        ('Name', lambda dist, name, entry_point, cls: name, True),
-                        ('Class', lambda dist, name, entry_points, cls: cls.__module__ + '.' + cls.__name__, True),
-                        ('Package', lambda dist, name, entry_point, cls: dist.metadata['name'], True),
-                        ('Version', lambda dist, name, entry_point, cls: dist.version, True),
-                        (
-                            'Class location',
-                            lambda dist, name, entry_point, cls: sys.modules[cls.__module__].__file__,
-                            True,
-                        ),
-                        (
-                            'Package location',
-                            lambda dist, name, entry_point, cls: (
-                                Distribution(dist).editable_project_location or str(dist.locate_file(''))
-                            ),
-                            True,
-                        ),
-                    )
+    @classmethod
+    def profile_section(cls, distributions, timeout):
+        activated_columns = {'group', 'name', 'time (ms)', 'modules', 'memory (kb)', 'error'}
+        profiles = ((profile,) for profile in cls.profile_startup(distributions, timeout))
+
+        return Reporter, PROFILE_COLUMNS, activated_columns, profiles, False
+
+    @staticmethod
+    def stream(output_format, sections):
+        """Write the rows of the sections as JSON objects, as soon as they are produced."""
+        first = True
+        if output_format == 'json':
+            sys.stdout.write('[')
+
+        for section, (_, columns, activated_columns, rows, _) in sections:
+            for row in rows:
+                record = {'section': section}
+                record.update(
+                    (name.lower(), extract(*row)) for name, extract, _ in columns if name.lower() in activated_columns
                 )
 
-                activated_columns = {'name', 'class', 'package', 'version'}
-                if location:
-                    activated_columns.add('class location')
-                    activated_columns.add('package location')
+                if output_format == 'json':
+                    sys.stdout.write(('\n' if first else ',\n') + json.dumps(record))
+                else:
+                    sys.stdout.write(json.dumps(record) + '\n')
+                    sys.stdout.flush()
+
+                first = False
+
+        if output_format == 'json':
+            sys.stdout.write('\n]\n')
 
-                applications = Services()
-                entry_points = applications.iter_entry_points(None, 'nagare.applications', {})
-                applications = applications.load_entry_points(entry_points, {})
+        return 0
 
-                app_reporter.report(activated_columns, applications, True, display, 0 if nb_sections == 1 else 2)
+    @classmethod
+    def run(
+        cls,
+        general_info,
+        packages_info,
+        services_info,
+        applications_info,
+        location,
+        metadata_only,
+        timeout,
+        registrations,
+        startup_profile,
+        output_format,
+        services_service,
+    ):
+        nb_sections = general_info + packages_info + services_info + applications_info + startup_profile
+        if nb_sections == 0:
+            general_info = packages_info = services_info = applications_info = True
+
+        implementation = getattr(sys, 'subversion', None)
+        implementation = implementation[0] if implementation else sys.implementation.name.capitalize()
+        has_user_data_file, user_data_file = cls.get_user_data_file()
+
+        distributions = index.get_registry()
+
+        sections = (
+            (
+                'packages',
+                'Nagare packages',
+                packages_info,
+                lambda: cls.packages_section(distributions, location, registrations),
+            ),
+            (
+                'services',
+                'Services',
+                services_info,
+                lambda: cls.services_section(services_service, location, output_format != 'table'),
+            ),
+            (
+                'applications',
+                'Applications',
+                applications_info,
+                lambda: cls.applications_section(distributions, location, metadata_only, timeout),
+            ),
+            (
+                'startup_profile',
+                'Startup profile',
+                startup_profile,
+                lambda: cls.profile_section(distributions, timeout),
+            ),
+        )
+        sections = [(name, title, section) for name, title, activated, section in sections if activated]
+
+        if output_format != 'table':
+            general = (
+                Reporter,
+                GENERAL_COLUMNS,
+                {'implementation', 'version', 'user configuration', 'found'},
+                [(implementation, sys.version, user_data_file, has_user_data_file)],
+                False,
+            )
+
+            return cls.stream(
+                output_format,
+                itertools.chain(
+                    [('general', general)] if general_info else [],
+                    ((name, section()) for name, _, section in sections),
+                ),
+            )
+
+        with admin.Banner(file=sys.stdout, buffered=True) as display:
+            if general_info:
+                display((implementation + ' ' + sys.version).splitlines())
+                display()
+
+                display('User configuration [%sFOUND]: ' % ('NOT ' if not has_user_data_file else ''))
+                display('')
+                display('  ' + user_data_file)
+                display('')
+
+            for _, title, section in sections:
+                if nb_sections != 1:
+                    display(title + ':')
+                    display('')
+
+                reporter, columns, activated_columns, rows, sort = section()
+                reporter(columns).report(activated_columns, list(rows), sort, display, 0 if nb_sections == 1 else 2)
+                display('')
 
             return 0
@@ -11,13 +11,28 @@
 import os
 import sys
 
-from . import complete
+
+def exit_status(code):
+    """Exit status of a ``SystemExit`` code or of a command result, as given by ``sys.exit()``."""
+    return code if isinstance(code, int) else (0 if code is None else 1)
 
 
 def run(*args):
     if '_ARGCOMPLETE' in os.environ:
+        from nagare.admin import complete
+
         complete.complete()
 
+    args = args or sys.argv
+
+    daemon = os.environ.get('NAGARE_DAEMON')
+    if daemon and (list(args[1:2]) != ['daemon']):
+        from nagare.admin import zygote
+
+        status = zygote.execute(daemon, args)
+        if status is not None:
+            return status
+
     from nagare.admin import run
 
-    return run.run(*(args or sys.argv))
+    return run.run(*args)
@@ -0,0 +1,85 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+import os
+import sys
+import contextlib
+import tracemalloc
+
+from nagare.admin import admin, services
+from nagare.admin.preload import get_rss
+from nagare.services.reporters import Reporter
+
+
+class MemoryProfiledServicesMixin(services.ProfiledServicesMixin):
+    """Record the memory allocated and the resident memory grown by the creation of each service.
+
+    The allocations of ``tracemalloc`` itself are excluded.
+    """
+
+    FILTERS = (tracemalloc.Filter(False, tracemalloc.__file__),)
+
+    @contextlib.contextmanager
+    def profile_service(self, profile):
+        snapshot = tracemalloc.take_snapshot().filter_traces(self.FILTERS)
+        rss = get_rss()
+        try:
+            with super().profile_service(profile):
+                yield
+        finally:
+            profile['rss'] = get_rss() - rss
+
+            stats = tracemalloc.take_snapshot().filter_traces(self.FILTERS).compare_to(snapshot, 'filename')
+            profile['size'] = sum(stat.size_diff for stat in stats)
+            profile['count'] = sum(stat.count_diff for stat in stats)
+
+
+class Memory(admin.Command):
+    DESC = 'display the memory retained by each service'
+    # The services are created sequentially, in the profiling thread
+    CONCURRENT_SERVICES = False
+
+    @classmethod
+    def get_services_factory(cls):
+        return services.profiled_services(super().get_services_factory(), MemoryProfiledServicesMixin)
+
+    def _run(self, command_names, config_filename=None, **arguments):
+        config_filename = os.path.abspath(config_filename)
+        config = self.load_config(config_filename)
+
+        tracemalloc.start()
+        try:
+            memory_services = self._create_services(config, config_filename)
+        finally:
+            tracemalloc.stop()
+
+        return memory_services(self.run, profiles=memory_services.profiles, **arguments)
+
+    @staticmethod
+    def run(profiles):
+        reporter = Reporter(
+            (
+                ('Name', lambda name, profile: name, True),
+                ('Retained (KB)', lambda name, profile: str(profile['size'] // 1024), False),
+                ('Allocations', lambda name, profile: str(profile['count']), False),
+                ('RSS (KB)', lambda name, profile: str(profile['rss'] // 1024), False),
+                ('Time (ms)', lambda name, profile: '%.1f' % (profile['duration'] * 1000), False),
+            )
+        )
+
+        with admin.Banner(file=sys.stdout, buffered=True) as display:
+            reporter.report(
+                {'name', 'retained (kb)', 'allocations', 'rss (kb)', 'time (ms)'},
+                list(profiles.items()),
+                False,
+                display,
+                0,
+            )
+
+        return 0
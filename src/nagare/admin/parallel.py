@@ -0,0 +1,100 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+"""Run a command against many configuration files in parallel."""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import subprocess
+from concurrent import futures
+
+
+def parse_configs_arguments(args, with_jobs=True):
+    """Extract the ``--configs`` and ``--jobs`` options from a command line.
+
+    ``--jobs`` is only extracted with ``--configs``, else it's left to the command.
+
+    Args:
+      args: the command line
+      with_jobs: extract ``--jobs`` too, else it's left to the command
+
+    Returns:
+      the configuration files patterns, the number of jobs and the remaining arguments
+    """
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument('--configs', action='append', default=[])
+
+    arguments, remaining = parser.parse_known_args(args)
+    if not arguments.configs:
+        return [], None, list(args)
+
+    if not with_jobs:
+        return arguments.configs, None, remaining
+
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument('--jobs', type=int, default=None)
+    jobs, remaining = parser.parse_known_args(remaining)
+
+    return arguments.configs, jobs.jobs, remaining
+
+
+def find_configs(patterns):
+    config_filenames = []
+    for pattern in patterns:
+        for config_filename in sorted(glob.glob(os.path.expanduser(pattern))):
+            config_filename = os.path.abspath(config_filename)
+            if config_filename not in config_filenames:
+                config_filenames.append(config_filename)
+
+    return config_filenames
+
+
+def run_config(command_names, args, config_filename):
+    start = time.perf_counter()
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, '-m', 'nagare.admin'] + list(command_names[1:]) + list(args) + [config_filename],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
+    return process.returncode, process.stdout, time.perf_counter() - start
+
+
+def run_configs(command_names, patterns, jobs, args):
+    """Run a command once by configuration file, ``jobs`` at a time.
+
+    The output of each run is displayed as a block, prefixed by its configuration file,
+    as soon as the run is finished.
+
+    Returns:
+      the list of ``(config filename, exit status, duration)`` in the configuration files order
+    """
+    config_filenames = find_configs(patterns)
+    results = {}
+
+    with futures.ThreadPoolExecutor(jobs or os.cpu_count()) as executor:
+        runs = {
+            executor.submit(run_config, command_names, args, config_filename): config_filename
+            for config_filename in config_filenames
+        }
+
+        for run in futures.as_completed(runs):
+            config_filename = runs[run]
+            status, output, duration = run.result()
+            results[config_filename] = (config_filename, status, duration)
+
+            prefix = '[{}] '.format(os.path.relpath(config_filename))
+            sys.stdout.write(''.join(prefix + line + '\n' for line in output.splitlines()))
+            sys.stdout.flush()
+
+    return [results[config_filename] for config_filename in config_filenames]
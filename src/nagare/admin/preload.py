@@ -0,0 +1,156 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+"""Preload stage, run before the command dispatch.
+
+Configured in the ``[services]`` section:
+
+  - ``preload_command``: Python code to execute
+  - ``preload_modules``: modules to import
+  - ``preload_hooks``: ``module:function`` callables to call, with the configuration
+  - ``preload_services``: create the services
+  - ``preload_app``: create the services and the application
+  - ``preload_gc_freeze``: move all the preloaded objects to the permanent GC generation,
+    so that the memory pages stay shared with the forked workers
+  - ``preload_report``: display the time and memory of each step on stderr
+
+The ``preload_*`` options, except ``preload_command``, are removed from the
+configuration before the services are created. The stage itself only runs
+once by configuration file, the first time ``preload()`` is called for it.
+"""
+
+import gc
+import os
+import re
+import sys
+import time
+import importlib
+
+PRELOAD_OPTIONS = (
+    'preload_modules',
+    'preload_hooks',
+    'preload_services',
+    'preload_app',
+    'preload_gc_freeze',
+    'preload_report',
+)
+
+PRELOADED_SERVICES = {}
+PRELOADED_CONFIGS = set()
+
+
+def as_list(value):
+    return value if isinstance(value, (list, tuple)) else [v for v in re.split(r'[\s,]+', value or '') if v]
+
+
+def as_bool(value):
+    return value if isinstance(value, bool) else str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def get_rss():
+    """Current resident memory of the process, in bytes (peak resident memory if not available)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+        except ImportError:
+            return 0
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+def pop_preloaded_services(config_filename, command_factory):
+    """Take the preloaded services of a configuration.
+
+    Args:
+      config_filename: path of the configuration file
+      command_factory: the command class which would create the services
+
+    Returns:
+      the services and if the application was created, ``(None, False)`` if no
+      services were preloaded by the same ``_create_services()`` as the command's one
+    """
+    services, app_created, preload_factory = PRELOADED_SERVICES.pop(config_filename, (None, False, None))
+    if (services is None) or (
+        preload_factory._create_services.__func__ is not command_factory._create_services.__func__
+    ):
+        return None, False
+
+    return services, app_created
+
+
+def preload(config, config_filename, command_factory):
+    """Run the preload stage.
+
+    Args:
+      config: the configuration
+      config_filename: path of the configuration file
+      command_factory: the command class used to create the services
+
+    Returns:
+      the list of ``(step, duration, memory delta)``, empty if the configuration
+      was already preloaded by this process (or by the daemon it was forked from)
+    """
+    config_filename = os.path.abspath(config_filename)
+    services_config = config.get('services', {})
+
+    options = {option: services_config.pop(option) for option in PRELOAD_OPTIONS if option in services_config}
+
+    if config_filename in PRELOADED_CONFIGS:
+        return []
+
+    PRELOADED_CONFIGS.add(config_filename)
+
+    exec(services_config.get('preload_command', ''))  # noqa: S102
+
+    if not options:
+        return []
+
+    steps = []
+
+    def step(name, f, *args):
+        rss = get_rss()
+        start = time.perf_counter()
+        result = f(*args)
+        steps.append((name, time.perf_counter() - start, get_rss() - rss))
+
+        return result
+
+    for module in as_list(options.get('preload_modules')):
+        step('import ' + module, importlib.import_module, module)
+
+    for hook in as_list(options.get('preload_hooks')):
+        module, function = hook.split(':')
+        step('call ' + hook, lambda: getattr(importlib.import_module(module), function)(config))
+
+    create_app = as_bool(options.get('preload_app', False))
+    if create_app or as_bool(options.get('preload_services', False)):
+        services = step('create services', command_factory._create_services, config, config_filename)
+
+        publisher = services.get('publisher')
+        if create_app and publisher:
+            step('create application', services, publisher.create_app)
+
+        PRELOADED_SERVICES[config_filename] = (services, create_app and bool(publisher), command_factory)
+
+    if as_bool(options.get('preload_gc_freeze', False)) and hasattr(gc, 'freeze'):
+
+        def freeze():
+            gc.collect()
+            gc.freeze()
+
+        step('gc freeze', freeze)
+
+    if as_bool(options.get('preload_report', False)):
+        for name, duration, memory in steps:
+            print('Preload: {:40} {:8.1f}ms {:8}KB'.format(name, duration * 1000, memory // 1024), file=sys.stderr)
+
+    return steps
@@ -13,22 +13,20 @@ import os
 
 from colorama import init
 
-from nagare import log
-from nagare.config import ConfigError, config_from_file
-
-from . import admin
+from . import admin, trace, preload
 
 
 def run(*args):
     if (len(args) > 1) and os.path.isfile(args[-1]):
-        config_filename = os.path.abspath(args[-1])
-        here = os.path.dirname(config_filename)
+        from nagare.config import ConfigError
+
         try:
-            config = config_from_file(config_filename, {'here': here}, 1)
+            config = admin.Command.load_config(args[-1])
         except (UnicodeDecodeError, ConfigError):
             config = {}
 
-        exec(config.get('services', {}).get('preload_command', ''))  # noqa: S102
+        with trace.span('preload', 'config'):
+            preload.preload(config, args[-1], admin.Command)
 
     init()
 
@@ -37,8 +35,11 @@ def run(*args):
         command_name = 'nagare'
 
     try:
-        commands = admin.NagareCommands(name=command_name, entry_points='nagare.commands')
-        return commands.execute(args=args[1:])
+        with trace.span(command_name, 'command', args=list(args[1:])):
+            commands = admin.NagareCommands(name=command_name, entry_points='nagare.commands')
+            return commands.execute(args=args[1:])
     except Exception:
+        from nagare import log
+
         log.get_logger('nagare.services.exceptions').error('Unhandled exception', exc_info=True)
         return -1
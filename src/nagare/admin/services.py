@@ -0,0 +1,254 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+"""Services loading strategies."""
+
+import time
+import hashlib
+import inspect
+import contextlib
+from concurrent import futures
+
+from nagare import log
+from nagare.admin import index, trace
+
+
+class PendingPlugin:
+    """Stand-in for a service still created in a worker thread.
+
+    Any use of the stand-in waits for the service to be created. The stand-ins
+    are replaced by their services when their tier is complete.
+    """
+
+    def __init__(self, name, future):
+        self._name = name
+        self._future = future
+
+    @property
+    def plugin(self):
+        return self._future.result()
+
+    @property
+    def __class__(self):
+        return self.plugin.__class__
+
+    def __getattr__(self, name):
+        return getattr(self.plugin, name)
+
+    def __eq__(self, other):
+        return self.plugin == resolve_pendings(other)
+
+    def __ne__(self, other):
+        return self.plugin != resolve_pendings(other)
+
+    def __hash__(self):
+        return hash(self.plugin)
+
+    def __bool__(self):
+        return bool(self.plugin)
+
+    def __call__(self, *args, **kw):
+        return self.plugin(*args, **kw)
+
+    def __repr__(self):
+        return '<PendingPlugin {}>'.format(self._name)
+
+
+def resolve_pendings(value):
+    """Replace the stand-ins by their services, in the lists, tuples and dictionaries too."""
+    if type(value) is PendingPlugin:
+        return value.plugin
+
+    if type(value) in (list, tuple):
+        return type(value)(resolve_pendings(item) for item in value)
+
+    if type(value) is dict:
+        return {name: resolve_pendings(item) for name, item in value.items()}
+
+    return value
+
+
+class ConcurrentServicesMixin:
+    """Create the services of a same ``LOAD_PRIORITY`` tier concurrently.
+
+    A tier is waited for before the first service of the next tier is loaded,
+    or before a service of the same tier which depends on it. The errors are
+    raised in the loading order.
+
+    Each service is loaded in a worker thread and a ``PendingPlugin`` stand-in
+    is kept until its tier is complete. The stand-ins are then replaced by the
+    services in the services dictionary and in the result of ``load_plugins()``.
+    """
+
+    MAX_WORKERS = None
+
+    def __init__(self, *args, **kw):
+        self.creation_times = {}
+        self._executor = None
+        self._tier = None
+        self._pendings = []
+        super().__init__(*args, **kw)
+
+    def wait_pendings(self):
+        pendings, self._pendings = self._pendings, []
+
+        plugins = {}
+        for name, pending in pendings:
+            plugins[name] = pending.plugin
+
+        for name, plugin in self.items():
+            if type(plugin) is PendingPlugin:
+                self[name] = plugins.get(name, plugin.plugin)
+
+        for name, duration in self.creation_times.items():
+            if name in plugins:
+                log.get_logger('nagare.services').debug('Service <%s> created in %.3fs', name, duration)
+
+    def _load_plugin(self, name, dist, plugin_cls, *args, **kw):
+        dependencies = {
+            param[:-8] for param in inspect.signature(plugin_cls.__init__).parameters if param.endswith('_service')
+        }
+        pending_names = {pending_name for pending_name, _ in self._pendings}
+
+        if (self._tier != plugin_cls.LOAD_PRIORITY) or (dependencies & pending_names):
+            self.wait_pendings()
+            self._tier = plugin_cls.LOAD_PRIORITY
+
+        if self._executor is None:
+            self._executor = futures.ThreadPoolExecutor(self.MAX_WORKERS, thread_name_prefix='nagare-services')
+
+        load_plugin = super()._load_plugin
+
+        def create_plugin():
+            start = time.perf_counter()
+            try:
+                with trace.span('create ' + name, 'services'):
+                    return load_plugin(name, dist, plugin_cls, *args, **kw)
+            finally:
+                self.creation_times[name] = time.perf_counter() - start
+
+        pending = PendingPlugin(name, self._executor.submit(create_plugin))
+        self._pendings.append((name, pending))
+
+        return pending
+
+    def load_plugins(self, *args, **kw):
+        try:
+            plugins = super().load_plugins(*args, **kw)
+            self.wait_pendings()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+        return resolve_pendings(plugins)
+
+
+def concurrent_services(services_factory, max_workers=None):
+    """Create a services class creating the services of a same tier concurrently."""
+    return type(
+        'Concurrent' + services_factory.__name__,
+        (ConcurrentServicesMixin, services_factory),
+        {'MAX_WORKERS': max_workers},
+    )
+
+
+class RegistryServicesMixin:
+    """Resolve the services entry points from the process-wide entry points registry.
+
+    The installed distributions are only scanned once, for the commands and the services.
+    """
+
+    def iter_entry_points(self, name, entry_points, config):
+        return list(index.get_registry().iter_entry_points(entry_points))
+
+
+def registry_services(services_factory):
+    """Create a services class resolving its entry points from the registry."""
+    return type('Registry' + services_factory.__name__, (RegistryServicesMixin, services_factory), {})
+
+
+class CachedServicesMixin:
+    """Resolve the services entry points from a snapshot stored in the entry points index.
+
+    The snapshot is keyed by the group, the name and the configuration given
+    to ``iter_entry_points()`` and invalidated with the index when the
+    installed distributions change.
+    """
+
+    def iter_entry_points(self, name, entry_points, config):
+        key = hashlib.sha1(repr((name, entry_points, config)).encode('utf-8')).hexdigest()  # noqa: S324
+
+        def resolve():
+            resolved = super(CachedServicesMixin, self).iter_entry_points(name, entry_points, config)
+
+            return [
+                [dist.metadata['name'], plugin_name, [entry_point.name, entry_point.value, entry_point.group]]
+                for dist, plugin_name, entry_point in resolved
+            ]
+
+        dists = {}
+        resolved = []
+        for dist_name, plugin_name, entry in index.get_index().get_item('services', key, resolve):
+            dist = dists.setdefault(dist_name, index.LazyDistribution(dist_name))
+            resolved.append((dist, plugin_name, index.create_entry_point(entry, dist)))
+
+        return resolved
+
+
+def cached_services(services_factory):
+    """Create a services class resolving its entry points from the index."""
+    return type('Cached' + services_factory.__name__, (CachedServicesMixin, services_factory), {})
+
+
+class TracedServicesMixin:
+    """Record the entry points resolution and the creation of each service."""
+
+    def iter_entry_points(self, *args, **kw):
+        with trace.span('resolve plugins', 'services'):
+            return list(super().iter_entry_points(*args, **kw))
+
+    def _load_plugin(self, name, *args, **kw):
+        with trace.span(name, 'services'):
+            return super()._load_plugin(name, *args, **kw)
+
+
+class ProfiledServicesMixin:
+    """Profile the creation of each service, by name, in ``profiles``.
+
+    The nested plugins are profiled with the service creating them.
+    """
+
+    def __init__(self, *args, **kw):
+        self.profiles = {}
+        super().__init__(*args, **kw)
+
+    @contextlib.contextmanager
+    def profile_service(self, profile):
+        """Record the creation of a service in its profile."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            profile['duration'] = time.perf_counter() - start
+
+    def _load_plugin(self, name, *args, **kw):
+        profile = self.profiles[name] = {}
+        with self.profile_service(profile):
+            return super()._load_plugin(name, *args, **kw)
+
+
+def profiled_services(services_factory, profiled_mixin=ProfiledServicesMixin):
+    """Create a services class profiling the creation of each service."""
+    return type('Profiled' + services_factory.__name__, (profiled_mixin, services_factory), {})
+
+
+def traced_services(services_factory):
+    """Create a services class recording the spans of the services creation."""
+    return type('Traced' + services_factory.__name__, (TracedServicesMixin, services_factory), {})
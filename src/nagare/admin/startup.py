@@ -0,0 +1,178 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+import os
+import sys
+import time
+import inspect
+import functools
+
+from nagare.admin import info, admin, services
+from nagare.services.reporters import Reporter
+
+
+def time_start(services, timings):
+    """Record the time spent by each service in its ``handle_start()`` hook."""
+    for name, service in services.items():
+        handle_start = getattr(service, 'handle_start', None)
+        if handle_start is not None:
+
+            @functools.wraps(handle_start)
+            def timed_handle_start(*args, handle_start=handle_start, name=name, **kw):
+                start = time.perf_counter()
+                try:
+                    return handle_start(*args, **kw)
+                finally:
+                    timings[name] = timings.get(name, 0) + time.perf_counter() - start
+
+            service.handle_start = timed_handle_start
+
+
+def get_dependencies(plugin_cls):
+    """Names of the services injected into a plugin."""
+    return {param[:-8] for param in inspect.signature(plugin_cls.__init__).parameters if param.endswith('_service')}
+
+
+def finish_times(costs, dependencies):
+    """Earliest finish time of each service if all the services were started as soon as their dependencies are."""
+    finishes = {}
+
+    def finish(name):
+        if name not in finishes:
+            finishes[name] = 0  # Dependencies cycle guard
+            finishes[name] = costs[name] + max((finish(dep) for dep in dependencies[name] if dep in costs), default=0)
+
+        return finishes[name]
+
+    for name in costs:
+        finish(name)
+
+    return finishes
+
+
+def critical_path(costs, dependencies):
+    """Longest chain of dependent services.
+
+    Args:
+      costs: startup time of each service
+      dependencies: names of the services each service depends on
+
+    Returns:
+      the critical path duration, the services of the critical path and, by service,
+      the reduction of the critical path duration if the service was free
+    """
+    finishes = finish_times(costs, dependencies)
+    total = max(finishes.values(), default=0)
+
+    path = []
+    name = max(finishes, key=finishes.get) if finishes else None
+    while name is not None:
+        path.insert(0, name)
+        deps = [dep for dep in dependencies[name] if dep in finishes and dep not in path]
+        name = max(deps, key=finishes.get) if deps else None
+
+    blocks = {
+        name: total - max(finish_times(dict(costs, **{name: 0}), dependencies).values(), default=0) for name in costs
+    }
+
+    return total, path, blocks
+
+
+def ms(duration):
+    return '' if duration is None else '%.1f' % (duration * 1000)
+
+
+SERVICE_COLUMNS = tuple((name, lambda *row, f=f: f(*row[:4]), left) for name, f, left in info.SERVICES_COLUMNS) + (
+    ('Create (ms)', lambda l, n, e, c, profile: ms(profile.get('create')), False),
+    ('Start (ms)', lambda l, n, e, c, profile: ms(profile.get('start')), False),
+    ('Blocks (ms)', lambda l, n, e, c, profile: ms(profile.get('blocks')), False),
+    ('Critical', lambda l, n, e, c, profile: '*' if profile.get('critical') else '', True),
+)
+
+
+class Startup(admin.Command):
+    DESC = 'display the critical path of the services startup'
+    # The creation times are the services creation times, not their submission times to the worker threads
+    CONCURRENT_SERVICES = False
+
+    def set_arguments(self, parser):
+        parser.add_argument('-l', '--location', action='store_true', help='display the services location')
+
+        super().set_arguments(parser)
+
+    @classmethod
+    def get_services_factory(cls):
+        return services.profiled_services(super().get_services_factory())
+
+    def _run(self, command_names, config_filename=None, **arguments):
+        config_filename = os.path.abspath(config_filename)
+        config = self.load_config(config_filename)
+
+        startup_services = self._create_services(config, config_filename)
+        create_times = {name: profile['duration'] for name, profile in startup_services.profiles.items()}
+
+        start_times = {}
+        time_start(startup_services, start_times)
+
+        publisher = startup_services.get('publisher')
+        if publisher:
+            startup_services(publisher.create_app)
+
+        return startup_services(self.run, create_times=create_times, start_times=start_times, **arguments)
+
+    @staticmethod
+    def run(create_times, start_times, location, services_service):
+        tree = services_service.walk1('services', 'nagare.services', {}, {}, services_service.activated_by_default)
+
+        def extract_infos(plugins, path=()):
+            for plugin in plugins:
+                f, (entry, name, cls, plugin, children) = plugin
+                yield path + (name,), entry, cls
+
+                yield from extract_infos(children, path + (name,))
+
+        # The nested plugins are created, and profiled, with their service
+        rows = [row for row in extract_infos(tree) if row[0][0] in create_times]
+
+        top_levels = {path[0]: cls for path, entry, cls in rows if len(path) == 1}
+        costs = {name: create_times.get(name, 0) + start_times.get(name, 0) for name in top_levels}
+        dependencies = {name: get_dependencies(cls) for name, cls in top_levels.items()}
+        total, critical, blocks = critical_path(costs, dependencies)
+
+        def profile(path):
+            profile = {}
+            if len(path) == 1:
+                name = path[0]
+                profile.update(
+                    create=create_times.get(name),
+                    start=start_times.get(name),
+                    blocks=blocks[name],
+                    critical=name in critical,
+                )
+
+            return profile
+
+        columns = {'name', 'order', 'package', 'create (ms)', 'start (ms)', 'blocks (ms)', 'critical'}
+        if location:
+            columns.add('location')
+
+        with admin.Banner(file=sys.stdout, buffered=True) as display:
+            Reporter(SERVICE_COLUMNS).report(
+                columns,
+                [(len(path) - 1, path[-1], entry, cls, profile(path)) for path, entry, cls in rows],
+                False,
+                display,
+                0,
+            )
+
+            display('')
+            display('Sequential startup: {}ms'.format(ms(sum(costs.values()))))
+            display('Critical path: {}ms ({})'.format(ms(total), ' -> '.join(critical)))
+
+        return 0
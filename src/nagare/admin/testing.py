@@ -0,0 +1,219 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+"""Pytest plugin building the configuration and the services once.
+
+The configuration comes from the ``--nagare-config`` option, the ``nagare_config``
+ini option or the ``nagare_config_filename`` / ``nagare_config_dict`` fixtures,
+which can be overridden by a module or a ``conftest.py``.
+
+Fixtures:
+
+  - ``nagare_services``: services shared by all the tests with the same configuration
+  - ``nagare_module_services``: services built once for the tests of a module
+  - ``nagare_test_services``: copy-on-write view of ``nagare_services`` for a test
+
+Only the services replaced with ``nagare_test_services.override()`` are isolated:
+a test changing the state of a shared service changes it for all the next tests.
+Such a test must override the service with a new one or use its own services.
+"""
+
+import os
+import json
+import time
+import inspect
+
+import pytest
+
+
+class ServicesOverlay:
+    """Copy-on-write view of shared services.
+
+    The overridden services are only seen through the view, the shared services
+    are never replaced. Their state is not isolated.
+    """
+
+    def __init__(self, services):
+        self.services = services
+        self.overrides = {}
+
+    def override(self, name, service):
+        self.overrides[name] = service
+        return service
+
+    def get(self, name, default=None):
+        return self.overrides[name] if name in self.overrides else self.services.get(name, default)
+
+    def __getitem__(self, name):
+        return self.overrides[name] if name in self.overrides else self.services[name]
+
+    def __contains__(self, name):
+        return (name in self.overrides) or (name in self.services)
+
+    def __getattr__(self, name):
+        return getattr(self.services, name)
+
+    def __call__(self, f, *args, **kw):
+        """Call ``f``, injecting the overridden services then the shared ones."""
+        for param in inspect.signature(f).parameters:
+            if param.endswith('_service') and (param[:-8] in self.overrides):
+                kw.setdefault(param, self.overrides[param[:-8]])
+
+        return self.services(f, *args, **kw)
+
+
+def create_services(config_filename=None, config_dict=None, create_app=False):
+    """Create the services from a configuration file and/or a configuration dictionary.
+
+    An empty ``[application]`` section is added if the configuration has none.
+
+    Returns:
+      the services
+    """
+    from nagare.admin import admin
+    from nagare.config import config_from_dict
+
+    if config_filename:
+        config = admin.Command.load_config(config_filename)
+        if config_dict:
+            config = config_from_dict(config.dict())
+            config.merge(config_from_dict(config_dict))
+    else:
+        config = config_from_dict(config_dict or {})
+
+    if 'application' not in config:
+        config.merge(config_from_dict({'application': {}}))
+
+    services = admin.Command._create_services(config, config_filename)
+
+    publisher = services.get('publisher')
+    if create_app and publisher:
+        services(publisher.create_app)
+
+    return services
+
+
+class ServicesCache:
+    """Services built by configuration, with their build time and number of tests using them.
+
+    The time saved is the time the tests would have spent building their own services.
+    """
+
+    def __init__(self):
+        self.services = {}
+        self.builds = []  # (configuration, duration, number of uses)
+
+    def build(self, config_filename, config_dict, create_app):
+        start = time.perf_counter()
+        services = create_services(config_filename, config_dict, create_app)
+        duration = time.perf_counter() - start
+
+        label = config_filename or 'dict'
+        self.builds.append([label, duration, 0])
+
+        return services, len(self.builds) - 1
+
+    def use(self, build):
+        self.builds[build][2] += 1
+
+    def get(self, config_filename, config_dict, create_app):
+        key = (config_filename, json.dumps(config_dict, sort_keys=True, default=str), create_app)
+
+        if key not in self.services:
+            self.services[key] = self.build(config_filename, config_dict, create_app)
+
+        return self.services[key]
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.builds:
+            return
+
+        terminalreporter.section('Nagare services')
+        for label, duration, nb_uses in self.builds:
+            terminalreporter.write_line(
+                '{}: built in {:.3f}s, used by {} tests ({:.3f}s saved)'.format(
+                    label, duration, nb_uses, duration * max(nb_uses - 1, 0)
+                )
+            )
+
+        saved = sum(duration * max(nb_uses - 1, 0) for _, duration, nb_uses in self.builds)
+        terminalreporter.write_line(
+            '{} service graphs built in {:.3f}s, {:.3f}s of setup saved'.format(
+                len(self.builds), sum(duration for _, duration, _ in self.builds), saved
+            )
+        )
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('nagare')
+    group.addoption('--nagare-config', help='configuration file of the Nagare services')
+    parser.addini('nagare_config', 'configuration file of the Nagare services')
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(ServicesCache(), 'nagare-services-cache')
+
+
+@pytest.fixture(scope='module')
+def nagare_config_filename(request):
+    """Configuration file of the services, ``None`` to only use ``nagare_config_dict``."""
+    config_filename = request.config.getoption('nagare_config')
+    if config_filename:
+        return os.path.abspath(config_filename)
+
+    config_filename = request.config.getini('nagare_config')
+    return str(request.config.rootpath / config_filename) if config_filename else None
+
+
+@pytest.fixture(scope='module')
+def nagare_config_dict():
+    """Configuration merged over the configuration file."""
+    return {}
+
+
+@pytest.fixture(scope='module')
+def nagare_create_app():
+    """Create the application, as the commands with ``WITH_STARTED_SERVICES``."""
+    return False
+
+
+@pytest.fixture(scope='module')
+def nagare_shared_build(request, nagare_config_filename, nagare_config_dict, nagare_create_app):
+    cache = request.config.pluginmanager.get_plugin('nagare-services-cache')
+    return cache, cache.get(nagare_config_filename, nagare_config_dict, nagare_create_app)
+
+
+@pytest.fixture(scope='module')
+def nagare_module_build(request, nagare_config_filename, nagare_config_dict, nagare_create_app):
+    cache = request.config.pluginmanager.get_plugin('nagare-services-cache')
+    return cache, cache.build(nagare_config_filename, nagare_config_dict, nagare_create_app)
+
+
+@pytest.fixture
+def nagare_services(nagare_shared_build):
+    """Services built once for all the tests with the same configuration."""
+    cache, (services, build) = nagare_shared_build
+    cache.use(build)
+
+    return services
+
+
+@pytest.fixture
+def nagare_module_services(nagare_module_build):
+    """Services built once for the tests of a module."""
+    cache, (services, build) = nagare_module_build
+    cache.use(build)
+
+    return services
+
+
+@pytest.fixture
+def nagare_test_services(nagare_services):
+    """Copy-on-write view of the shared services, for the current test only."""
+    return ServicesOverlay(nagare_services)
@@ -0,0 +1,94 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+"""Timed spans of the command lifecycle, in the Chrome / Perfetto trace events format.
+
+Activated by ``NAGARE_TRACE=<trace file>`` (``{pid}`` is replaced by the process id).
+The trace is written at the process exit and can be opened with ``chrome://tracing``
+or https://ui.perfetto.dev
+"""
+
+import os
+import sys
+import time
+import atexit
+import functools
+import threading
+import contextlib
+
+NO_SPAN = contextlib.nullcontext()
+
+
+class Tracer:
+    def __init__(self, filename):
+        self.filename = filename
+        self.events = []
+        self.threads = {}
+        self.pid = os.getpid()
+
+    @staticmethod
+    def now():
+        return time.perf_counter_ns() / 1000
+
+    @contextlib.contextmanager
+    def span(self, name, category, **args):
+        thread = threading.current_thread()
+        self.threads.setdefault(thread.ident, thread.name)
+
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.events.append(
+                {
+                    'name': name,
+                    'cat': category,
+                    'ph': 'X',
+                    'ts': start,
+                    'dur': self.now() - start,
+                    'pid': self.pid,
+                    'tid': thread.ident,
+                    'args': args,
+                }
+            )
+
+    def save(self):
+        import json
+
+        if os.getpid() != self.pid:
+            # Forked process
+            return
+
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': ' '.join(sys.argv)}}]
+        metadata.extend(
+            {'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in self.threads.items()
+        )
+
+        with open(self.filename.format(pid=self.pid), 'w') as f:
+            json.dump({'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms'}, f)
+
+
+@functools.lru_cache()
+def get_tracer():
+    """The process tracer, ``None`` if ``NAGARE_TRACE`` is not set."""
+    filename = os.environ.get('NAGARE_TRACE')
+    if not filename:
+        return None
+
+    tracer = Tracer(os.path.abspath(os.path.expanduser(filename)))
+    atexit.register(tracer.save)
+
+    return tracer
+
+
+def span(name, category='nagare', **args):
+    """Context manager recording a timed span, doing nothing if the tracing is not activated."""
+    tracer = get_tracer()
+    return NO_SPAN if tracer is None else tracer.span(name, category, **args)
@@ -0,0 +1,201 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+"""Warm resident process forking a child for each ``nagare`` invocation.
+
+The client sends its stdio file descriptors, its arguments, environment and
+working directory over a local Unix socket. The daemon forks a child which
+takes them over and runs the command. The child answers with its pid then with
+the exit status of the command.
+
+This module is imported by the ``nagare`` entry point: keep it light.
+"""
+
+import os
+import sys
+import json
+import array
+import signal
+import socket
+import struct
+
+MAX_FDS = 3
+
+
+def get_socket_path(path=None):
+    if not path or (path == '1'):
+        from nagare.admin import index
+
+        path = os.path.join(index.get_cache_dir(), 'daemon-{}.sock'.format(os.getuid()))
+
+    return path
+
+
+def send(sock, message, fds=()):
+    data = json.dumps(message).encode('utf-8') + b'\n'
+    if fds:
+        sock.sendmsg([data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))])
+    else:
+        sock.sendall(data)
+
+
+def receive(sock, with_fds=False):
+    fds = array.array('i')
+    data = b''
+
+    while not data.endswith(b'\n'):
+        if with_fds and not data:
+            chunk, ancdata, _, _ = sock.recvmsg(65536, socket.CMSG_SPACE(MAX_FDS * fds.itemsize))
+            for level, kind, cmsg_data in ancdata:
+                if (level == socket.SOL_SOCKET) and (kind == socket.SCM_RIGHTS):
+                    fds.frombytes(cmsg_data[: len(cmsg_data) - (len(cmsg_data) % fds.itemsize)])
+        else:
+            chunk = sock.recv(65536)
+
+        if not chunk:
+            raise EOFError()
+
+        data += chunk
+
+    message = json.loads(data)
+    return (message, list(fds)) if with_fds else message
+
+
+def execute(path, args):
+    """Run a command in the daemon.
+
+    Returns:
+      the exit status or ``None`` if the daemon is not available or is restarting
+    """
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(get_socket_path(path))
+    except OSError:
+        return None
+
+    with sock:
+        try:
+            send(sock, {'argv': list(args), 'env': dict(os.environ), 'cwd': os.getcwd()}, [0, 1, 2])
+
+            message = receive(sock)
+            pid = message.get('pid')
+            if pid is None:
+                return None
+
+            forward = lambda signum, frame: os.kill(pid, signum)  # noqa: E731
+            signal.signal(signal.SIGINT, forward)
+            signal.signal(signal.SIGTERM, forward)
+
+            return receive(sock).get('status', -1)
+        except (OSError, EOFError, ValueError):
+            return -1
+
+
+def is_same_user(conn):
+    """Check the client runs as the daemon user, where the peer credentials are available."""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return True
+
+    _, uid, _ = struct.unpack('3i', conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i')))
+    return uid == os.getuid()
+
+
+def run_child(conn, server):
+    """Take over the client process context and run the command."""
+    server.close()
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+    status = -1
+    try:
+        message, fds = receive(conn, True)
+
+        for fd, target in zip(fds, (0, 1, 2)):
+            os.dup2(fd, target)
+            os.close(fd)
+
+        os.environ.clear()
+        os.environ.update(message['env'])
+        os.chdir(message['cwd'])
+        sys.argv = message['argv']
+
+        from nagare.admin import admin, trace
+
+        # Lookup of the user configuration and tracing activation with the client environment
+        admin.find_user_data_file.cache_clear()
+        trace.get_tracer.cache_clear()
+
+        send(conn, {'pid': os.getpid()})
+
+        from nagare.admin import run, main
+
+        status = main.exit_status(run.run(*sys.argv))
+    except SystemExit as e:
+        status = main.exit_status(e.code)
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            send(conn, {'status': status})
+        finally:
+            from nagare.admin import trace
+
+            # ``os._exit()`` doesn't run the ``atexit`` functions
+            tracer = trace.get_tracer()
+            if tracer is not None:
+                tracer.save()
+
+            os._exit(0)
+
+
+def serve(path, is_stale, on_ready=None):
+    """Accept the clients and fork a child for each of them.
+
+    Args:
+      path: path of the Unix socket
+      is_stale: function returning ``True`` when the daemon must be restarted
+      on_ready: function called when the daemon listens
+
+    Returns:
+      when the daemon is stale
+    """
+    path = get_socket_path(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        umask = os.umask(0o077)
+        try:
+            server.bind(path)
+        finally:
+            os.umask(umask)
+
+        server.listen(64)
+
+        if on_ready is not None:
+            on_ready(path)
+
+        try:
+            while True:
+                conn, _ = server.accept()
+
+                with conn:
+                    if not is_same_user(conn):
+                        continue
+
+                    if is_stale():
+                        send(conn, {'restart': True})
+                        break
+
+                    if os.fork() == 0:
+                        run_child(conn, server)
+        finally:
+            os.remove(path)
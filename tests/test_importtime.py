@@ -0,0 +1,90 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+"""Import-time budget of the bare ``nagare --help`` and shell completion paths.
+
+The number of imported modules is the hard gate. The import time depends on
+the machine and is only checked against a generous budget, in ms, set by the
+``NAGARE_MAX_IMPORT_TIME`` environment variable (default: 1000).
+"""
+
+import os
+import sys
+import subprocess
+
+import pytest
+
+pytest.importorskip('nagare.admin.admin')
+
+MAX_MODULES = 200
+MAX_TIME = float(os.environ.get('NAGARE_MAX_IMPORT_TIME', 1000))  # ms
+
+NAGARE = "import sys; from nagare.admin import main; sys.exit(main.run('nagare', *sys.argv[1:]))"
+
+
+def measure_imports(args=(), env=None):
+    """Import the ``nagare`` path in a fresh interpreter.
+
+    Returns:
+      the list of ``(module, self time in us, cumulative time in us)`` and the errors
+    """
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, '-X', 'importtime', '-c', NAGARE] + list(args),
+        env=dict(os.environ, **(env or {})),
+        capture_output=True,
+        text=True,
+    )
+
+    imports = []
+    errors = []
+    for line in process.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            self_time, cumulative, module = line[len('import time:') :].split('|')
+            if self_time.strip().isdigit():
+                imports.append((module.strip(), int(self_time), int(cumulative)))
+        else:
+            errors.append(line)
+
+    return imports, errors if process.returncode else []
+
+
+def check_budget(imports, errors):
+    assert not errors, '\n'.join(errors)
+
+    slowest = ', '.join(
+        '{} ({:.1f}ms)'.format(module, self_time / 1000)
+        for module, self_time, _ in sorted(imports, key=lambda i: i[1], reverse=True)[:10]
+    )
+
+    assert len(imports) <= MAX_MODULES, '{} modules imported, slowest: {}'.format(len(imports), slowest)
+
+    duration = sum(self_time for _, self_time, _ in imports) / 1000
+    assert duration <= MAX_TIME, '{:.1f}ms of imports, slowest: {}'.format(duration, slowest)
+
+
+def test_help_import_budget():
+    check_budget(*measure_imports(['--help']))
+
+
+def test_completion_import_budget(tmp_path):
+    pytest.importorskip('argcomplete')
+
+    line = 'nagare '
+    env = {
+        '_ARGCOMPLETE': '1',
+        '_ARGCOMPLETE_SHELL': 'bash',
+        '_ARGCOMPLETE_STDOUT_FILENAME': str(tmp_path / 'completions'),
+        'COMP_LINE': line,
+        'COMP_POINT': str(len(line)),
+        'NAGARE_CACHE_DIR': str(tmp_path / 'cache'),
+    }
+
+    # The first completion builds the index, the budget is for the next ones
+    measure_imports(env=env)
+    check_budget(*measure_imports(env=env))
@@ -0,0 +1,63 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+import sys
+
+import pytest
+
+admin = pytest.importorskip('nagare.admin.admin')
+index = pytest.importorskip('nagare.admin.index')
+
+COMMAND_MODULE = """
+from nagare.admin import admin
+
+
+class Command(admin.Command):
+    WITH_CONFIG_FILENAME = False
+
+    def _run(self, command_names, **arguments):
+        return 42
+"""
+
+MODULES = ('lazy_dispatch_one', 'lazy_dispatch_two')
+
+
+@pytest.fixture
+def commands_path(tmp_path, monkeypatch):
+    dist_info = tmp_path / 'lazy_dispatch-1.0.dist-info'
+    dist_info.mkdir()
+    (dist_info / 'METADATA').write_text('Metadata-Version: 2.1\nName: lazy-dispatch\nVersion: 1.0\n')
+    (dist_info / 'entry_points.txt').write_text(
+        '[nagare.commands]\n' + ''.join('{0} = {0}:Command\n'.format(module) for module in MODULES)
+    )
+
+    for module in MODULES:
+        (tmp_path / (module + '.py')).write_text(COMMAND_MODULE)
+
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv('NAGARE_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(index, 'REGISTRY', None)
+    monkeypatch.setattr(index, 'INDEX', None)
+
+    yield tmp_path
+
+    for module in MODULES:
+        sys.modules.pop(module, None)
+
+
+def test_only_dispatched_command_imported(commands_path):
+    commands = admin.NagareCommands(name='nagare', entry_points='nagare.commands')
+    assert isinstance(commands['lazy_dispatch_one'], admin.LazyCommand)
+
+    assert not any(module in sys.modules for module in MODULES)
+
+    assert commands.execute(args=['lazy_dispatch_one']) == 42
+
+    assert 'lazy_dispatch_one' in sys.modules
+    assert 'lazy_dispatch_two' not in sys.modules
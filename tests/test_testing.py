@@ -0,0 +1,140 @@
+# --
+# Copyright (c) 2014-2026 Net-ng.
+# All rights reserved.
+#
+# This software is licensed under the BSD License, as described in
+# the file LICENSE.txt, which you should have received as part of
+# this distribution.
+# --
+
+import itertools
+
+import pytest
+
+testing = pytest.importorskip('nagare.admin.testing')
+
+pytest_plugins = ['pytester']
+
+TEST_A = """
+def test_shared(nagare_services, nagare_module_services):
+    assert nagare_services is not nagare_module_services
+
+
+def test_shared_again(nagare_services):
+    assert nagare_services['name'] == 'services'
+
+
+def test_module(nagare_module_services):
+    assert nagare_module_services['name'] == 'services'
+"""
+
+TEST_B = """
+def test_shared(nagare_services):
+    assert nagare_services['name'] == 'services'
+
+
+def test_module(nagare_module_services):
+    assert nagare_module_services['name'] == 'services'
+"""
+
+TEST_OVERRIDE = """
+def test_override(nagare_services, nagare_test_services):
+    assert nagare_test_services.override('name', 'overridden') == 'overridden'
+
+    assert nagare_test_services['name'] == 'overridden'
+    assert nagare_test_services.get('name') == 'overridden'
+    assert nagare_services['name'] == 'services'
+
+
+def test_not_overridden(nagare_test_services):
+    assert nagare_test_services['name'] == 'services'
+"""
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    builds = itertools.count()
+
+    def create_services(config_filename=None, config_dict=None, create_app=False):
+        return {'name': 'services', 'build': next(builds)}
+
+    monkeypatch.setattr(testing, 'create_services', create_services)
+
+    return builds
+
+
+def run(pytester, **modules):
+    pytester.makepyfile(**modules)
+    return pytester.runpytest('-p', 'no:nagare', '-p', 'nagare.admin.testing')
+
+
+def test_session_and_module_builds(pytester, builds):
+    result = run(pytester, test_a=TEST_A, test_b=TEST_B)
+
+    result.assert_outcomes(passed=5)
+    assert next(builds) == 3
+    result.stdout.fnmatch_lines(
+        [
+            '*Nagare services*',
+            'dict: built in *s, used by 3 tests (*s saved)',
+            'dict: built in *s, used by 2 tests (*s saved)',
+            'dict: built in *s, used by 1 tests (*s saved)',
+            '3 service graphs built in *s, *s of setup saved',
+        ]
+    )
+
+
+def test_override_isolation(pytester, builds):
+    result = run(pytester, test_override=TEST_OVERRIDE)
+
+    result.assert_outcomes(passed=2)
+    assert next(builds) == 1
+    result.stdout.fnmatch_lines(['dict: built in *s, used by 2 tests (*s saved)'])
+
+
+def test_no_summary_without_services(pytester, builds):
+    result = run(pytester, test_nothing='def test_nothing():\n    pass\n')
+
+    result.assert_outcomes(passed=1)
+    assert next(builds) == 0
+    result.stdout.no_fnmatch_line('*Nagare services*')
+
+
+TEST_REAL = """
+def test_services(nagare_services, nagare_module_services):
+    assert nagare_services is not nagare_module_services
+"""
+
+APPLICATION_CONFIG = """
+[application]
+name = test
+"""
+
+
+@pytest.fixture
+def real_services():
+    pytest.importorskip('nagare.config')
+    pytest.importorskip('nagare.services.services')
+
+
+def test_real_build_from_dict(pytester, real_services):
+    result = run(pytester, test_real=TEST_REAL)
+
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(['2 service graphs built in *s, *s of setup saved'])
+
+
+def test_real_builds_from_file(tmp_path, real_services):
+    from nagare.admin import admin
+
+    config_filename = str(tmp_path / 'application.cfg')
+    with open(config_filename, 'w') as f:
+        f.write(APPLICATION_CONFIG)
+
+    assert testing.create_services(config_filename, {'application': {'debug': 'on'}}) is not None
+    assert testing.create_services(config_filename, create_app=True) is not None
+
+    # The builds don't modify the configuration loaded once by process
+    config = admin.Command.load_config(config_filename)
+    assert '_initial_config' not in config['application']
+    assert 'debug' not in config['application']